@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+import puntos_mano
+from tracker import detectar_centro_mano
+
+# Landmark de MediaPipe correspondiente a la punta del índice
+PUNTA_INDICE = 8
+
+
+class BackendTracker(ABC):
+    """
+    Interfaz común de los backends de seguimiento de mano.
+
+    Function Details:
+        - `detectar(frame)` devuelve el mismo contrato que `detectar_centro_mano`:
+          una tupla ((x, y), mask), con (x, y) en píxeles enteros o None si no
+          hay mano, lista para pasarse a `paso_kalman`. Es el único método que
+          cada backend debe implementar.
+        - `mask` puede ser None si el backend no genera máscara.
+        - `configurar(nivel)` aplica los parámetros de un `calidad.NivelCalidad`
+          que el backend entienda e ignora el resto.
+        - `cerrar()` libera los recursos del backend.
+    """
+
+    nombre = "base"
+
+    @abstractmethod
+    def detectar(self, frame):
+        pass
+
+    def configurar(self, nivel):
+        pass
+
+    def cerrar(self):
+        pass
+
+
+class BackendPiel(BackendTracker):
+    """
+    Backend basado en segmentación de piel en YCrCb (`tracker.detectar_centro_mano`).
+
+    Args:
+        dibujar (bool): Si es True, dibuja el contorno y el punto detectado.
+    """
+
+    nombre = "piel"
+
+    def __init__(self, dibujar=True):
+        self.dibujar = dibujar
+        self.escala = 1.0
+        self.blur = 7
+        self.dilatacion = 2
+
+    def detectar(self, frame):
+        return detectar_centro_mano(frame, self.dibujar, self.escala, self.blur,
+                                    self.dilatacion)
+
+    def configurar(self, nivel):
+        self.escala = nivel.escala
+        self.blur = nivel.blur
+        self.dilatacion = nivel.dilatacion
+
+
+class BackendMediapipe(BackendTracker):
+    """
+    Backend basado en MediaPipe Hands que usa la punta del índice (landmark 8).
+
+    Args:
+        dibujar (bool): Si es True, dibuja el esqueleto de la mano y la punta.
+        min_detection_confidence (float): Confianza mínima de detección.
+        min_tracking_confidence (float): Confianza mínima de seguimiento.
+        hands: Modelo compartido (compatible con process()) a usar en lugar de
+               crear uno propio; el backend no lo cierra.
+
+    Function Details:
+        - Importa mediapipe al construirse, de modo que el backend de piel sigue
+          disponible aunque mediapipe no esté instalado.
+        - Limita el modelo a una mano para reducir la latencia.
+    """
+
+    nombre = "mediapipe"
+
+    def __init__(self, dibujar=True, min_detection_confidence=0.7,
+                 min_tracking_confidence=0.6, hands=None):
+        self.dibujar = dibujar
+        self.propio = hands is None
+        if hands is None:
+            import mediapipe as mp
+
+            hands = mp.solutions.hands.Hands(
+                max_num_hands=1,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence)
+        self.hands = hands
+        self.escala = 1.0
+
+    def detectar(self, frame):
+        entrada = frame
+        if self.escala < 1.0:
+            entrada = cv2.resize(frame, None, fx=self.escala, fy=self.escala,
+                                 interpolation=cv2.INTER_AREA)
+        frame_rgb = cv2.cvtColor(entrada, cv2.COLOR_BGR2RGB)
+        puntos, _ = puntos_mano.desde_resultados(self.hands.process(frame_rgb))
+        if len(puntos) == 0:
+            return None, None
+
+        h, w = frame.shape[:2]
+        x, y = puntos[0, PUNTA_INDICE, :2] * (w, h)
+        x = int(np.clip(x, 0, w - 1))
+        y = int(np.clip(y, 0, h - 1))
+
+        if self.dibujar:
+            puntos_mano.dibujar_manos(frame, puntos)
+            cv2.circle(frame, (x, y), 6, (255, 0, 0), -1)
+
+        return (x, y), None
+
+    def configurar(self, nivel):
+        self.escala = nivel.escala
+
+    def cerrar(self):
+        if self.propio:
+            self.hands.close()
+
+
+BACKENDS = {
+    BackendPiel.nombre: BackendPiel,
+    BackendMediapipe.nombre: BackendMediapipe,
+}
+
+
+def crear_backend(nombre, **kwargs):
+    """
+    Crea un backend de seguimiento a partir de su nombre.
+
+    Args:
+        nombre (str): Clave en BACKENDS ("piel" o "mediapipe").
+        **kwargs: Parámetros propios del backend.
+
+    Returns:
+        BackendTracker: Instancia del backend solicitado.
+    """
+    if nombre not in BACKENDS:
+        raise ValueError(
+            f"Backend desconocido: {nombre}. Opciones: {', '.join(BACKENDS)}")
+    return BACKENDS[nombre](**kwargs)
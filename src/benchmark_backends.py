@@ -0,0 +1,188 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backends_tracker import BACKENDS, crear_backend
+from tracker_kalman import crear_kalman, inicializar_estado, paso_kalman
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VIDEO_POR_DEFECTO = os.path.join(BASE_DIR, "..", "data", "demo", "DEMO.mkv")
+
+
+def leer_video(ruta, max_frames=None):
+    """
+    Carga en memoria los frames de un vídeo para que todos los backends
+    procesen exactamente la misma secuencia.
+
+    Args:
+        ruta (str): Ruta al vídeo grabado.
+        max_frames (int or None): Número máximo de frames a leer.
+
+    Returns:
+        List[np.ndarray]: Frames en formato BGR.
+    """
+    cap = cv2.VideoCapture(ruta)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def jitter(puntos):
+    """
+    Mide el temblor de una trayectoria como la RMS de su segunda diferencia.
+
+    Args:
+        puntos (np.ndarray): Array (N, 2) con NaN en los frames sin detección.
+
+    Returns:
+        float: Jitter en píxeles, o NaN si no hay tres detecciones consecutivas.
+
+    Function Details:
+        - La segunda diferencia (aceleración por frame) es casi nula en un
+          movimiento suave y crece con el ruido de la medida.
+        - Los tramos con huecos se descartan al propagarse los NaN.
+    """
+    if len(puntos) < 3:
+        return float("nan")
+    acel = puntos[2:] - 2 * puntos[1:-1] + puntos[:-2]
+    norma = np.linalg.norm(acel, axis=1)
+    norma = norma[~np.isnan(norma)]
+    if len(norma) == 0:
+        return float("nan")
+    return float(np.sqrt(np.mean(norma ** 2)))
+
+
+def ejecutar_backend(backend, frames):
+    """
+    Ejecuta un backend sobre todos los frames midiendo la latencia por frame.
+
+    Args:
+        backend (BackendTracker): Backend a evaluar.
+        frames (List[np.ndarray]): Frames del vídeo.
+
+    Returns:
+        dict: Latencias (ms), medidas y estimaciones de Kalman por frame.
+    """
+    kf = crear_kalman()
+    kalman_inicializado = False
+    latencias = np.empty(len(frames))
+    medidas = np.full((len(frames), 2), np.nan)
+    estimaciones = np.full((len(frames), 2), np.nan)
+
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter()
+        medida, _ = backend.detectar(frame)
+        latencias[i] = (time.perf_counter() - t0) * 1000.0
+
+        if medida is not None:
+            medidas[i] = medida
+            if not kalman_inicializado:
+                inicializar_estado(kf, medida[0], medida[1])
+                kalman_inicializado = True
+        if kalman_inicializado:
+            estimaciones[i] = paso_kalman(kf, medida)
+
+    return {"latencias": latencias, "medidas": medidas,
+            "estimaciones": estimaciones}
+
+
+def resumir(nombre, datos, referencia=None):
+    """
+    Calcula las métricas comparativas de un backend.
+
+    Args:
+        nombre (str): Nombre del backend.
+        datos (dict): Resultado de `ejecutar_backend`.
+        referencia (dict or None): Resultado del backend de referencia para
+                                   medir el error de posición.
+
+    Returns:
+        dict: Métricas de latencia, tasa de detección, jitter y error.
+    """
+    lat = datos["latencias"]
+    detectado = ~np.isnan(datos["medidas"][:, 0])
+    resumen = {
+        "backend": nombre,
+        "lat_media": float(np.mean(lat)),
+        "lat_p95": float(np.percentile(lat, 95)),
+        "fps": float(1000.0 / np.mean(lat)),
+        "deteccion": float(np.mean(detectado)),
+        "jitter_medida": jitter(datos["medidas"]),
+        "jitter_kalman": jitter(datos["estimaciones"]),
+        "error_ref": float("nan"),
+    }
+    if referencia is not None:
+        dist = np.linalg.norm(datos["medidas"] - referencia["medidas"], axis=1)
+        dist = dist[~np.isnan(dist)]
+        if len(dist):
+            resumen["error_ref"] = float(np.median(dist))
+    return resumen
+
+
+def imprimir_tabla(resumenes, nombre_ref):
+    """
+    Muestra por consola la tabla comparativa de backends.
+    """
+    print(f"{'backend':<10} {'lat ms':>8} {'p95 ms':>8} {'fps':>7} "
+          f"{'detec.':>7} {'jit med':>8} {'jit kal':>8} {'err ref':>8}")
+    for r in resumenes:
+        print(f"{r['backend']:<10} {r['lat_media']:8.2f} {r['lat_p95']:8.2f} "
+              f"{r['fps']:7.1f} {r['deteccion']:7.1%} {r['jitter_medida']:8.2f} "
+              f"{r['jitter_kalman']:8.2f} {r['error_ref']:8.2f}")
+    if nombre_ref:
+        print(f"err ref: mediana de la distancia (px) a la medida de '{nombre_ref}'.")
+
+
+def main():
+    """
+    Compara la latencia y el jitter de los backends de seguimiento sobre un
+    mismo vídeo grabado.
+
+    Function Details:
+        - Carga el vídeo una sola vez en memoria para que la lectura de disco
+          no afecte a las latencias medidas.
+        - Ejecuta cada backend sin dibujar sobre el frame.
+        - Usa el backend de referencia (por defecto MediaPipe, cuya punta del
+          índice es exacta) para estimar el error de posición de los demás.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark de backends de seguimiento de mano.")
+    parser.add_argument("--video", default=VIDEO_POR_DEFECTO)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS),
+                        choices=list(BACKENDS))
+    parser.add_argument("--referencia", default="mediapipe")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    frames = leer_video(args.video, args.max_frames)
+    if not frames:
+        print(f"Error: no se pudieron leer frames de {args.video}.")
+        return
+    print(f"{len(frames)} frames de {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    resultados = {}
+    for nombre in args.backends:
+        backend = crear_backend(nombre, dibujar=False)
+        try:
+            resultados[nombre] = ejecutar_backend(backend, frames)
+        finally:
+            backend.cerrar()
+
+    referencia = resultados.get(args.referencia)
+    resumenes = [
+        resumir(nombre, datos, referencia if nombre != args.referencia else None)
+        for nombre, datos in resultados.items()
+    ]
+    imprimir_tabla(resumenes, args.referencia if referencia is not None else None)
+
+
+if __name__ == "__main__":
+    main()
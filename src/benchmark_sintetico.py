@@ -0,0 +1,392 @@
+import argparse
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from calidad import NIVELES_CALIDAD
+from tracker import actualizar_trayectoria, detectar_centro_mano
+from tracker_kalman import crear_kalman, inicializar_estado, paso_kalman
+
+COLOR_PIEL = (120, 150, 200)
+COLOR_FONDO = (100, 90, 50)
+
+# Frames iniciales que no cuentan en las métricas (convergencia de Kalman)
+CALENTAMIENTO = 30
+# Distancia (px) a la verdad a partir de la cual una medida se considera errónea
+UMBRAL_ERROR = 25.0
+# Desplazamiento máximo (frames) que se prueba al estimar el retardo
+MAX_RETARDO = 15
+
+
+def _lissajous(a, b, desfase):
+    return lambda fase: (np.sin(2 * np.pi * a * fase + desfase),
+                         np.sin(2 * np.pi * b * fase))
+
+
+def _linea(fase):
+    # Onda triangular: ida y vuelta horizontal a velocidad constante
+    return 1.0 - 4.0 * abs(fase - 0.5), 0.0
+
+
+# Trayectorias paramétricas normalizadas: fase en [0, 1) -> (u, v) en [-1, 1]
+TRAYECTORIAS = {
+    "circulo": _lissajous(1, 1, np.pi / 2),
+    "ocho": _lissajous(1, 2, 0.0),
+    "lissajous": _lissajous(3, 2, np.pi / 4),
+    "linea": _linea,
+}
+
+
+def dibujar_mano(frame, punta, tamano, color=COLOR_PIEL):
+    """
+    Dibuja una mano esquemática (palma, pulgar e índice extendido) cuyo punto
+    más alto es exactamente `punta`.
+
+    Args:
+        frame (np.ndarray): Imagen BGR destino.
+        punta (tuple): Coordenadas (x, y) de la punta del índice.
+        tamano (float): Semieje vertical de la palma en píxeles.
+        color (tuple): Color BGR de la piel.
+
+    Returns:
+        None
+    """
+    x, y = punta
+    dedo = (int(round(0.2 * tamano)), int(round(0.7 * tamano)))
+    cv2.ellipse(frame, (int(round(x)), int(round(y)) + dedo[1]), dedo,
+                0, 0, 360, color, -1)
+    palma = (int(round(x)), int(round(y + 1.6 * tamano)))
+    cv2.ellipse(frame, palma, (int(0.8 * tamano), int(tamano)), 0, 0, 360, color, -1)
+    cv2.ellipse(frame, (palma[0] - int(0.8 * tamano), palma[1] + int(0.1 * tamano)),
+                (int(0.2 * tamano), int(0.5 * tamano)), -35, 0, 360, color, -1)
+
+
+class GeneradorSintetico:
+    """
+    Genera vídeo sintético con verdad de terreno para evaluar el seguimiento.
+
+    Args:
+        ancho (int): Ancho del frame.
+        alto (int): Alto del frame.
+        fps (float): Frecuencia del vídeo simulado; fija el tiempo entre frames.
+        trayectoria (str): Nombre de la trayectoria en TRAYECTORIAS.
+        periodo (float): Segundos que tarda la punta en recorrer la trayectoria.
+        ruido (float): Desviación típica del ruido gaussiano del sensor (niveles de gris).
+        iluminacion (float): Amplitud de la variación de iluminación (0 = constante).
+        distractores (int): Número de manchas de color piel que se mueven por la escena.
+        semilla (int): Semilla del generador aleatorio.
+
+    Function Details:
+        - La punta del índice recorre la trayectoria paramétrica dentro de los
+          márgenes que dejan la mano entera en el frame; su posición exacta en
+          cada frame es la verdad de terreno.
+        - La iluminación combina un degradado horizontal fijo y una ganancia
+          global que oscila en el tiempo, lo que desplaza el tono de la piel
+          hacia los límites del umbral YCrCb.
+        - Los distractores son manchas redondas de color piel, más pequeñas que
+          la mano, que se dibujan por debajo de ella y pueden unirse a su contorno.
+    """
+
+    def __init__(self, ancho=640, alto=480, fps=30.0, trayectoria="circulo",
+                 periodo=4.0, ruido=0.0, iluminacion=0.0, distractores=0, semilla=0):
+        self.ancho = ancho
+        self.alto = alto
+        self.fps = fps
+        self.camino = TRAYECTORIAS[trayectoria]
+        self.periodo = periodo
+        self.ruido = ruido
+        self.iluminacion = iluminacion
+        self.rng = np.random.default_rng(semilla)
+
+        self.tamano = min(ancho, alto) / 10.0
+        margen = self.tamano
+        self.caja = (margen, margen, ancho - margen, alto - 2.7 * self.tamano - margen)
+
+        self.fondo = np.empty((alto, ancho, 3), np.uint8)
+        self.fondo[:] = COLOR_FONDO
+        degradado = 1.0 + 0.5 * iluminacion * np.linspace(-1.0, 1.0, ancho, dtype=np.float32)
+        self.degradado = np.ascontiguousarray(
+            np.broadcast_to(degradado[None, :, None], (alto, ancho, 3)))
+
+        self.distractores = [
+            (self.rng.uniform(0.3, 0.6) * self.tamano,
+             self.rng.uniform(0.1, 0.3), self.rng.uniform(0.1, 0.3),
+             self.rng.uniform(0, 2 * np.pi), self.rng.uniform(0, 2 * np.pi))
+            for _ in range(distractores)
+        ]
+
+    def punta(self, t):
+        """
+        Posición real (x, y) de la punta del índice en el instante t (segundos).
+        """
+        u, v = self.camino((t / self.periodo) % 1.0)
+        x0, y0, x1, y1 = self.caja
+        return (x0 + (u + 1) * 0.5 * (x1 - x0), y0 + (v + 1) * 0.5 * (y1 - y0))
+
+    def frame(self, i):
+        """
+        Genera el frame i.
+
+        Returns:
+            tuple: (frame BGR, punta real (x, y) en float).
+        """
+        t = i / self.fps
+        frame = self.fondo.copy()
+
+        for radio, fx, fy, fase_x, fase_y in self.distractores:
+            centro = (int(self.ancho * (0.5 + 0.45 * np.sin(2 * np.pi * fx * t + fase_x))),
+                      int(self.alto * (0.5 + 0.45 * np.sin(2 * np.pi * fy * t + fase_y))))
+            cv2.circle(frame, centro, int(radio), COLOR_PIEL, -1)
+
+        punta = self.punta(t)
+        dibujar_mano(frame, punta, self.tamano)
+
+        if self.iluminacion:
+            ganancia = 1.0 + 0.5 * self.iluminacion * np.sin(2 * np.pi * t / 3.1)
+            frame = cv2.multiply(frame, self.degradado * ganancia, dtype=cv2.CV_8U)
+        if self.ruido:
+            ruido = self.rng.normal(0.0, self.ruido, frame.shape).astype(np.float32)
+            frame = cv2.add(frame, ruido, dtype=cv2.CV_8U)
+
+        return frame, punta
+
+
+def ejecutar(generador, total, nivel, dibujar=True, escritor=None):
+    """
+    Pasa el vídeo sintético por el pipeline AirDraw midiendo cada frame.
+
+    Args:
+        generador (GeneradorSintetico): Fuente de frames con verdad de terreno.
+        total (int): Número de frames.
+        nivel (NivelCalidad): Escala, morfología, cadencia y longitud de trayectoria.
+        dibujar (bool): Si es True, dibuja el contorno detectado como en main.py.
+        escritor (cv2.VideoWriter or None): Si se indica, guarda los frames generados.
+
+    Returns:
+        dict: Latencias (ms), puntas reales, medidas, estimaciones y frames inferidos.
+
+    Function Details:
+        - Solo se mide `detectar_centro_mano`, `paso_kalman` y
+          `actualizar_trayectoria`; la generación del frame queda fuera.
+        - Con cadencia > 1 los frames intermedios solo predicen con Kalman,
+          igual que `AirDrawSession`.
+    """
+    kf = crear_kalman()
+    kalman_inicializado = False
+    historial = deque(maxlen=nivel.trayectoria)
+    latencias = np.empty(total)
+    reales = np.empty((total, 2))
+    medidas = np.full((total, 2), np.nan)
+    estimaciones = np.full((total, 2), np.nan)
+    inferidos = np.zeros(total, bool)
+
+    for i in range(total):
+        frame, reales[i] = generador.frame(i)
+        if escritor is not None:
+            escritor.write(frame)
+
+        t0 = time.perf_counter()
+        medida = None
+        if i % nivel.cadencia == 0:
+            inferidos[i] = True
+            medida, _ = detectar_centro_mano(frame, dibujar, nivel.escala, nivel.blur,
+                                             nivel.dilatacion)
+        if medida is not None and not kalman_inicializado:
+            inicializar_estado(kf, medida[0], medida[1])
+            kalman_inicializado = True
+        estimacion = paso_kalman(kf, medida) if kalman_inicializado else None
+        actualizar_trayectoria(frame, estimacion, historial)
+        latencias[i] = (time.perf_counter() - t0) * 1000.0
+
+        if medida is not None:
+            medidas[i] = medida
+        if estimacion is not None:
+            estimaciones[i] = estimacion
+
+    return {"latencias": latencias, "reales": reales, "medidas": medidas,
+            "estimaciones": estimaciones, "inferidos": inferidos}
+
+
+def estimar_retardo(reales, puntos, sesgo=(0.0, 0.0), max_retardo=MAX_RETARDO):
+    """
+    Estima cuántos frames va por detrás una serie de puntos respecto a la verdad.
+
+    Args:
+        reales (np.ndarray): Array (N, 2) con la posición real.
+        puntos (np.ndarray): Array (N, 2) estimado, con NaN en los huecos.
+        sesgo (tuple): Desvío fijo (dx, dy) del detector que se descuenta antes
+                       de comparar.
+        max_retardo (int): Desplazamiento máximo en frames que se prueba.
+
+    Returns:
+        float: Retardo en frames (con decimales; negativo si se adelanta), o NaN
+               si no hay datos.
+
+    Function Details:
+        - Para cada desplazamiento k compara puntos[i] - sesgo con reales[i - k]
+          y toma la mediana de la distancia. Descontar el sesgo del detector
+          (por ejemplo el que introduce el suavizado de la máscara) evita que
+          se confunda con un retardo en los tramos rectos de la trayectoria.
+        - El retardo es el k de menor coste, refinado con una parábola sobre
+          los tres desplazamientos vecinos para obtener fracciones de frame.
+    """
+    desplazamientos = np.arange(-max_retardo, max_retardo + 1)
+    costes = np.full(len(desplazamientos), np.inf)
+    puntos = puntos - np.asarray(sesgo)
+    n = len(reales)
+    for j, k in enumerate(desplazamientos):
+        if k >= 0:
+            dist = np.linalg.norm(puntos[k:] - reales[:n - k], axis=1)
+        else:
+            dist = np.linalg.norm(puntos[:n + k] - reales[-k:], axis=1)
+        dist = dist[~np.isnan(dist)]
+        if len(dist):
+            costes[j] = np.median(dist)
+
+    j = int(np.argmin(costes))
+    if not np.isfinite(costes[j]):
+        return float("nan")
+    if 0 < j < len(costes) - 1 and np.all(np.isfinite(costes[j - 1:j + 2])):
+        c0, c1, c2 = costes[j - 1:j + 2]
+        curvatura = c0 - 2 * c1 + c2
+        if curvatura > 0:
+            return float(desplazamientos[j] + 0.5 * (c0 - c2) / curvatura)
+    return float(desplazamientos[j])
+
+
+def resumir(nombre, datos, fps_video, calentamiento=CALENTAMIENTO,
+            umbral_error=UMBRAL_ERROR):
+    """
+    Calcula las métricas de rendimiento y precisión de una ejecución.
+
+    Args:
+        nombre (str): Etiqueta de la ejecución.
+        datos (dict): Resultado de `ejecutar`.
+        fps_video (float): Frecuencia del vídeo simulado.
+        calentamiento (int): Frames iniciales excluidos de las métricas.
+        umbral_error (float): Distancia (px) por encima de la cual una medida es errónea.
+
+    Returns:
+        dict: Rendimiento, pérdidas, errores y retardo.
+
+    Function Details:
+        - pérdida: fracción de frames inferidos sin detección (la mano siempre
+          está en la imagen).
+        - errónea: fracción de detecciones a más de `umbral_error` de la punta
+          real (contorno equivocado, distractor o máscara rota).
+        - El sesgo es la mediana del desvío de las medidas, que se toman sobre
+          el mismo frame y por tanto no tienen retardo.
+        - El retardo en ms suma el retardo del filtro (frames * periodo del
+          vídeo) y la latencia media de proceso, que es lo que tarda en
+          aparecer el punto dibujado tras llegar el frame.
+    """
+    lat = datos["latencias"]
+    sl = slice(calentamiento, None)
+    reales = datos["reales"][sl]
+    medidas = datos["medidas"][sl]
+    estimaciones = datos["estimaciones"][sl]
+    inferidos = datos["inferidos"][sl]
+
+    detectado = ~np.isnan(medidas[:, 0])
+    desvio = (medidas - reales)[detectado]
+    err_med = np.linalg.norm(desvio, axis=1)
+    sesgo = np.median(desvio, axis=0) if len(desvio) else np.zeros(2)
+    err_kal = np.linalg.norm(estimaciones - reales, axis=1)
+    err_kal = err_kal[~np.isnan(err_kal)]
+    retardo = estimar_retardo(reales, estimaciones, sesgo)
+
+    def mediana(x):
+        return float(np.median(x)) if len(x) else float("nan")
+
+    return {
+        "nombre": nombre,
+        "fps": float(1000.0 / np.mean(lat)),
+        "lat_media": float(np.mean(lat)),
+        "lat_p95": float(np.percentile(lat, 95)),
+        "perdida": float(1.0 - np.mean(detectado[inferidos])) if inferidos.any() else float("nan"),
+        "erronea": float(np.mean(err_med > umbral_error)) if len(err_med) else float("nan"),
+        "sesgo": float(np.linalg.norm(sesgo)),
+        "err_medida": mediana(err_med),
+        "err_kalman": mediana(err_kal),
+        "err_kalman_p95": float(np.percentile(err_kal, 95)) if len(err_kal) else float("nan"),
+        "retardo_frames": retardo,
+        "retardo_ms": retardo * 1000.0 / fps_video + float(np.mean(lat)),
+    }
+
+
+def imprimir_tabla(resumenes):
+    """
+    Muestra por consola la tabla de resultados.
+    """
+    print(f"{'nivel':<8} {'fps':>7} {'lat ms':>7} {'p95 ms':>7} {'pérdida':>8} "
+          f"{'errónea':>8} {'sesgo':>6} {'err med':>8} {'err kal':>8} {'kal p95':>8} "
+          f"{'ret fr':>7} {'ret ms':>7}")
+    for r in resumenes:
+        print(f"{r['nombre']:<8} {r['fps']:7.1f} {r['lat_media']:7.2f} {r['lat_p95']:7.2f} "
+              f"{r['perdida']:8.1%} {r['erronea']:8.1%} {r['sesgo']:6.2f} {r['err_medida']:8.2f} "
+              f"{r['err_kalman']:8.2f} {r['err_kalman_p95']:8.2f} "
+              f"{r['retardo_frames']:7.2f} {r['retardo_ms']:7.1f}")
+    print("err: mediana de la distancia (px) a la punta real; ret: retardo del punto "
+          "dibujado (ms = frames del filtro + latencia de proceso).")
+
+
+def main():
+    """
+    Benchmark de extremo a extremo del seguimiento sobre vídeo sintético.
+
+    Function Details:
+        - Genera una mano de color piel que recorre una trayectoria conocida,
+          con ruido, cambios de iluminación y distractores configurables.
+        - Ejecuta el pipeline del modo AirDraw (`detectar_centro_mano`,
+          `paso_kalman` y `actualizar_trayectoria`) con cada nivel de
+          `calidad.NIVELES_CALIDAD` pedido con --niveles.
+        - Informa del rendimiento, la tasa de pérdidas y de medidas erróneas,
+          el error de posición y el retardo en frames y en ms.
+        - No necesita cámara ni GPU; con --guardar escribe además el vídeo
+          generado y la verdad de terreno (.npy) para reutilizarlos, por ejemplo
+          con benchmark_backends.py.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark de retardo y precisión del seguimiento con vídeo sintético.")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--ancho", type=int, default=640)
+    parser.add_argument("--alto", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30.0, help="FPS del vídeo simulado.")
+    parser.add_argument("--trayectoria", default="circulo", choices=list(TRAYECTORIAS))
+    parser.add_argument("--periodo", type=float, default=4.0)
+    parser.add_argument("--ruido", type=float, default=4.0)
+    parser.add_argument("--iluminacion", type=float, default=0.3)
+    parser.add_argument("--distractores", type=int, default=2)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--niveles", type=int, nargs="+", default=[0],
+                        help="Índices de calidad.NIVELES_CALIDAD a evaluar.")
+    parser.add_argument("--sin-dibujo", action="store_true")
+    parser.add_argument("--guardar", default=None, help="Ruta .avi del vídeo generado.")
+    args = parser.parse_args()
+
+    resumenes = []
+    for indice in args.niveles:
+        generador = GeneradorSintetico(args.ancho, args.alto, args.fps, args.trayectoria,
+                                       args.periodo, args.ruido, args.iluminacion,
+                                       args.distractores, args.semilla)
+        escritor = None
+        if args.guardar and not resumenes:
+            escritor = cv2.VideoWriter(args.guardar, cv2.VideoWriter_fourcc(*"MJPG"),
+                                       args.fps, (args.ancho, args.alto))
+        datos = ejecutar(generador, args.frames, NIVELES_CALIDAD[indice],
+                         not args.sin_dibujo, escritor)
+        if escritor is not None:
+            escritor.release()
+            np.save(args.guardar.rsplit(".", 1)[0] + ".npy", datos["reales"])
+        resumenes.append(resumir(f"nivel {indice}", datos, args.fps))
+
+    print(f"{args.frames} frames de {args.ancho}x{args.alto} a {args.fps:g} fps, "
+          f"trayectoria '{args.trayectoria}' ({args.periodo:g} s), ruido {args.ruido:g}, "
+          f"iluminación {args.iluminacion:g}, distractores {args.distractores}")
+    imprimir_tabla(resumenes)
+
+
+if __name__ == "__main__":
+    main()
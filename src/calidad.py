@@ -0,0 +1,110 @@
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de un nivel de calidad:
+#   escala: reducción del frame antes de segmentar y de MediaPipe
+#   blur: tamaño de los filtros de suavizado de la máscara de piel
+#   dilatacion: iteraciones de dilatación de la máscara
+#   cadencia: se ejecuta la inferencia uno de cada `cadencia` frames
+#   trayectoria: puntos de la trayectoria que se dibujan
+#   landmarks: si se dibuja el esqueleto de la mano
+NivelCalidad = namedtuple(
+    "NivelCalidad",
+    ["escala", "blur", "dilatacion", "cadencia", "trayectoria", "landmarks"],
+)
+
+# Niveles ordenados de mayor calidad (el pipeline original) a menor coste
+NIVELES_CALIDAD = (
+    NivelCalidad(1.0, 7, 2, 1, 200, True),
+    NivelCalidad(0.75, 5, 2, 1, 150, True),
+    NivelCalidad(0.5, 5, 1, 2, 100, True),
+    NivelCalidad(0.5, 3, 1, 3, 50, False),
+    NivelCalidad(0.35, 3, 1, 4, 30, False),
+)
+
+# Margen sobre el presupuesto a partir del cual se baja de nivel, y fracción
+# del presupuesto por debajo de la cual se vuelve a subir
+MARGEN_BAJADA = 1.05
+MARGEN_SUBIDA = 0.6
+# Frames mínimos entre dos cambios de nivel (la subida es más prudente)
+ESPERA_BAJADA = 15
+ESPERA_SUBIDA = 90
+
+
+class ControladorCalidad:
+    """
+    Controlador que ajusta el nivel de calidad para mantener un FPS objetivo.
+
+    Args:
+        fps_objetivo (float): Frecuencia de frames que se quiere sostener.
+        niveles (tuple): Niveles disponibles, del más caro al más barato.
+        nivel_min (int): Índice del nivel de mayor calidad permitido.
+        nivel_max (int or None): Índice del nivel más barato permitido.
+        alfa (float): Peso de la media móvil exponencial de la latencia.
+
+    Function Details:
+        - Suaviza la latencia por frame con una media móvil exponencial.
+        - Si la media supera el presupuesto (1 / fps_objetivo) con margen, baja
+          un nivel; si queda muy por debajo durante más tiempo, sube uno. La
+          histéresis entre ambos márgenes y las esperas evitan oscilaciones.
+        - Cada decisión se registra con `logging` y se guarda en `decisiones`.
+    """
+
+    def __init__(self, fps_objetivo, niveles=NIVELES_CALIDAD, nivel_min=0,
+                 nivel_max=None, alfa=0.1):
+        self.presupuesto = 1.0 / fps_objetivo
+        self.niveles = niveles
+        self.nivel_min = nivel_min
+        self.nivel_max = len(niveles) - 1 if nivel_max is None else nivel_max
+        self.alfa = alfa
+        self.indice = nivel_min
+        self.latencia_media = None
+        self.frames_desde_cambio = 0
+        self.decisiones = []
+
+    @property
+    def nivel(self):
+        """
+        NivelCalidad: Parámetros del nivel actual.
+        """
+        return self.niveles[self.indice]
+
+    def registrar(self, latencia):
+        """
+        Registra la latencia de un frame y decide si cambiar de nivel.
+
+        Args:
+            latencia (float): Tiempo de proceso del frame en segundos.
+
+        Returns:
+            NivelCalidad or None: El nuevo nivel si ha cambiado, o None.
+        """
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media += self.alfa * (latencia - self.latencia_media)
+        self.frames_desde_cambio += 1
+
+        nuevo = self.indice
+        if (self.latencia_media > self.presupuesto * MARGEN_BAJADA
+                and self.frames_desde_cambio >= ESPERA_BAJADA
+                and self.indice < self.nivel_max):
+            nuevo = self.indice + 1
+        elif (self.latencia_media < self.presupuesto * MARGEN_SUBIDA
+                and self.frames_desde_cambio >= ESPERA_SUBIDA
+                and self.indice > self.nivel_min):
+            nuevo = self.indice - 1
+
+        if nuevo == self.indice:
+            return None
+
+        decision = (self.indice, nuevo, self.latencia_media)
+        self.decisiones.append(decision)
+        logger.info("Calidad %d -> %d: latencia media %.1f ms, presupuesto %.1f ms (%s)",
+                    self.indice, nuevo, self.latencia_media * 1000.0,
+                    self.presupuesto * 1000.0, self.niveles[nuevo])
+        self.indice = nuevo
+        self.frames_desde_cambio = 0
+        return self.nivel
@@ -0,0 +1,159 @@
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from servicio import escribir_frame
+
+COLOR_PIEL = (120, 150, 200)
+
+
+def frames_sinteticos(ancho, alto, total):
+    """
+    Genera frames con una mancha de color piel que recorre una circunferencia.
+
+    Args:
+        ancho (int): Ancho del frame.
+        alto (int): Alto del frame.
+        total (int): Número de frames a generar.
+
+    Yields:
+        np.ndarray: Frame BGR.
+    """
+    fondo = np.full((alto, ancho, 3), 40, np.uint8)
+    radio = min(ancho, alto) // 3
+    for i in range(total):
+        frame = fondo.copy()
+        ang = 2 * np.pi * i / 120.0
+        centro = (int(ancho / 2 + radio * np.cos(ang)),
+                  int(alto / 2 + radio * np.sin(ang)))
+        cv2.circle(frame, centro, min(ancho, alto) // 12, COLOR_PIEL, -1)
+        yield frame
+
+
+def frames_video(ruta, total):
+    """
+    Lee hasta `total` frames de un vídeo grabado.
+
+    Yields:
+        np.ndarray: Frame BGR.
+    """
+    cap = cv2.VideoCapture(ruta)
+    n = 0
+    while n < total:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+        n += 1
+    cap.release()
+
+
+class Recolector:
+    """
+    Lee los eventos NDJSON devueltos por el servicio y acumula métricas.
+
+    Function Details:
+        - Para cada evento "frame" mide la latencia entre la marca de tiempo
+          enviada y la recepción del evento.
+        - Cuenta los frames analizados, los omitidos por carga y los puntos.
+    """
+
+    def __init__(self):
+        self.latencias = []
+        self.omitidos = 0
+        self.analizados = 0
+        self.puntos = 0
+        self.autenticado = False
+
+    def leer(self, flujo):
+        for linea in flujo:
+            evento = json.loads(linea)
+            tipo = evento["tipo"]
+            if tipo == "frame":
+                self.latencias.append((time.time() - evento["t"]) * 1000.0)
+                if evento["omitido"]:
+                    self.omitidos += 1
+                else:
+                    self.analizados += 1
+            elif tipo == "punto":
+                self.puntos += 1
+            elif tipo == "autenticado":
+                self.autenticado = True
+
+    def informe(self, enviados, duracion):
+        print(f"Frames enviados: {enviados} en {duracion:.2f} s "
+              f"({enviados / max(duracion, 1e-9):.1f} fps)")
+        print(f"Frames analizados: {self.analizados}, omitidos por carga: {self.omitidos}")
+        print(f"Eventos de punto: {self.puntos}, autenticado: {self.autenticado}")
+        if self.latencias:
+            lat = np.array(self.latencias)
+            print(f"Latencia ms: media {lat.mean():.1f}, p50 {np.percentile(lat, 50):.1f}, "
+                  f"p95 {np.percentile(lat, 95):.1f}, máx {lat.max():.1f}")
+
+
+def main():
+    """
+    Generador local de frames para probar y cargar el modo servicio.
+
+    Function Details:
+        - Envía frames sintéticos (o de un vídeo con --video) a la cadencia pedida
+          con --fps; con --fps 0 los envía tan rápido como el servicio los acepte.
+        - Con --socket se conecta al servicio, recoge los eventos de vuelta y
+          muestra el rendimiento y la latencia de extremo a extremo.
+        - Sin --socket escribe los frames en la salida estándar, para encadenarlo
+          con `servicio.py` mediante una tubería.
+    """
+    parser = argparse.ArgumentParser(description="Generador de frames para servicio.py.")
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--ancho", type=int, default=640)
+    parser.add_argument("--alto", type=int, default=480)
+    args = parser.parse_args()
+
+    if args.video:
+        frames = frames_video(args.video, args.frames)
+    else:
+        frames = frames_sinteticos(args.ancho, args.alto, args.frames)
+
+    recolector = None
+    if args.socket:
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(args.socket)
+        salida = conexion.makefile("wb")
+        recolector = Recolector()
+        lector = threading.Thread(target=recolector.leer,
+                                  args=(conexion.makefile("r", encoding="utf-8"),))
+        lector.start()
+    else:
+        salida = sys.stdout.buffer
+
+    periodo = 1.0 / args.fps if args.fps > 0 else 0.0
+    inicio = time.time()
+    enviados = 0
+    for n, frame in enumerate(frames):
+        if periodo:
+            espera = inicio + n * periodo - time.time()
+            if espera > 0:
+                time.sleep(espera)
+        escribir_frame(salida, frame, n, time.time())
+        enviados += 1
+    salida.flush()
+    duracion = time.time() - inicio
+
+    if recolector is not None:
+        conexion.shutdown(socket.SHUT_WR)
+        lector.join()
+        conexion.close()
+        recolector.informe(enviados, duracion)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import cv2
+import logging
 import time
 import seguridad  # módulo de autenticación por gestos
-from tracker import detectar_centro_mano, actualizar_trayectoria
-from tracker_kalman import crear_kalman, inicializar_estado, paso_kalman
+from sesion import AirDrawSession
+from render import HiloRender
 import calibration
 
+# Backend de seguimiento del modo AirDraw: "piel" o "mediapipe"
+BACKEND_TRACKER = "piel"
+
+# Frecuencia de refresco de la ventana (el proceso no espera a la pantalla)
+FPS_PANTALLA = 60
+
+# FPS de proceso que intenta sostener el control adaptativo de calidad (None lo desactiva)
+FPS_OBJETIVO = 30
+
 
 def main():
     """
@@ -19,15 +29,21 @@ def main():
     Function Details:
         - Realiza la calibración de la cámara, obteniendo sus parámetros intrínsecos y de distorsión.
         - Inicia la captura de video desde la cámara web mediante OpenCV.
-        - Inicializa el filtro de Kalman que se utilizará para estimar trayectorias suaves de la mano.
-        - Llama al módulo seguridad para ejecutar el sistema de autenticación en dos fases:
+        - Crea una `AirDrawSession` con su propio estado de seguridad, filtro de Kalman
+          y trayectoria.
+        - La sesión usa el módulo seguridad para ejecutar el sistema de autenticación en dos fases:
             1. Secuencia de gestos con los dedos (3 → 2 → 1 → 5)
             2. Validación visual mostrando un cuadrado frente a la cámara
         - Una vez completada la autenticación, cambia al modo Tracker (AirDraw):
-            - Detecta la posición de la mano con `detectar_centro_mano`.
+            - Detecta la posición de la mano con el backend BACKEND_TRACKER
+              (segmentación de piel o punta del índice con MediaPipe).
             - Inicializa y actualiza el filtro de Kalman para suavizar la trayectoria.
             - Dibuja las predicciones y la trayectoria de la mano en tiempo real sobre el video.
-        - Muestra los resultados en una ventana única (AirDraw Secure) que combina ambos modos.
+        - Si el proceso no alcanza FPS_OBJETIVO, la sesión reduce escala, morfología,
+          cadencia de inferencia y detalle del dibujo, y los recupera cuando sobra tiempo.
+        - Muestra los resultados en una ventana única (AirDraw Secure) que combina ambos modos,
+          desde un hilo de render propio: el bucle publica cada frame sin esperar a
+          `imshow`/`waitKey`, y los textos del HUD se pegan como sprites cacheados.
         - Permite salir del programa presionando la tecla q.
         - Al finalizar, libera los recursos de cámara y cierra todas las ventanas de OpenCV.
     """
@@ -51,80 +67,46 @@ def main():
         print("Error: no se pudo abrir la cámara.")
         return
 
-    # Filtro de Kalman
-    kf = crear_kalman()
-    kalman_inicializado = False
+    # Sesión: estado de seguridad, filtro de Kalman y trayectoria
+    modelo_manos = seguridad.crear_modelo_manos()
+    logging.basicConfig(level=logging.INFO)
+    sesion = AirDrawSession("local", modelo_manos, backend_tracker=BACKEND_TRACKER,
+                            fps_objetivo=FPS_OBJETIVO)
 
-    # Detector de seguridad
-    seguridad.inicializar_detector()
-
-    modo_tracker = False
+    # Hilo de render
+    render = HiloRender("AirDraw Secure", FPS_PANTALLA)
+    render.iniciar()
 
     # Inicialización para cálculo de FPS
     prev_time = time.time()
 
     # Bucle principal de captura de video
-    while True:
+    while not render.parar.is_set():
         ret, frame = cap.read()
         if not ret:
             break
 
-        # modo seguridad
-        if not modo_tracker:
-            frame = seguridad.procesar_frame(frame)
-            cv2.putText(frame, "Modo Seguridad", (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-
-            if seguridad.desbloqueado and seguridad.cuadrado_detectado:
-                print(">> Seguridad completada. Activando tracker...")
-                modo_tracker = True
-
-        # modo airdraw
-        else:
-            medida, mask = detectar_centro_mano(frame)
+        modo_tracker = sesion.modo_tracker
+        frame, _ = sesion.procesar(frame)
 
-            if medida is not None and not kalman_inicializado:
-                inicializar_estado(kf, medida[0], medida[1])
-                kalman_inicializado = True
-
-            if kalman_inicializado:
-                x_pred, y_pred = paso_kalman(kf, medida)
-
-                if medida is not None:
-                    cv2.circle(frame, medida, 6, (0, 255, 0), -1)
-                cv2.circle(frame, (x_pred, y_pred), 6, (0, 0, 255), -1)
-
-                frame = actualizar_trayectoria(frame, (x_pred, y_pred))
-            else:
-                frame = actualizar_trayectoria(frame, None)
-
-            cv2.putText(frame, "Tracker Mano (AirDraw)", (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        if sesion.modo_tracker and not modo_tracker:
+            print(">> Seguridad completada. Activando tracker...")
 
         current_time = time.time()
         fps = 1.0 / (current_time - prev_time)
         prev_time = current_time
 
+        # mostrar la salida (FPS redondeado para reutilizar su sprite)
         h, w, _ = frame.shape
-        cv2.putText(
-            frame,
-            f"FPS: {fps:.2f}",
-            (w - 180, h - 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (255, 255, 255),
-            2
-        )
-
-        # mostrar la salida
-        cv2.imshow("AirDraw Secure", frame)
-
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
+        render.publicar(frame, [
+            (f"FPS: {fps:.0f}", (w - 180, h - 20), (255, 255, 255), 0.7, 2),
+        ])
 
     # limpieza final de recursos
+    render.detener()
     cap.release()
+    sesion.cerrar()
+    modelo_manos.close()
     cv2.destroyAllWindows()
 
 
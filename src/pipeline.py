@@ -0,0 +1,562 @@
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from backends_tracker import BACKENDS
+
+# Políticas cuando el anillo está lleno
+POLITICA_BLOQUEAR = "bloquear"
+POLITICA_DESCARTAR_NUEVO = "descartar_nuevo"
+POLITICA_DESCARTAR_ANTIGUO = "descartar_antiguo"
+POLITICAS = (POLITICA_BLOQUEAR, POLITICA_DESCARTAR_NUEVO, POLITICA_DESCARTAR_ANTIGUO)
+
+FIN = "fin"
+
+# Fuente de frames generados (sin cámara) para medir el rendimiento
+FUENTE_SINTETICA = "sintetico"
+
+
+class AnilloFrames:
+    """
+    Búfer circular de frames en memoria compartida entre procesos.
+
+    Args:
+        ctx: Contexto de multiprocessing con el que se crean las colas.
+        forma (tuple): Forma de cada frame (alto, ancho, canales).
+        slots (int): Número de frames que caben en el anillo.
+
+    Function Details:
+        - Los píxeles viven en un único bloque de `shared_memory`; entre procesos
+          solo viajan el índice del slot y unos metadatos pequeños.
+        - La cola `libres` contiene los slots disponibles para el productor y la
+          cola `listos` los slots publicados pendientes de consumir, en orden.
+        - La contrapresión se controla con la política de `reservar`.
+        - El objeto se puede pasar a un proceso hijo; allí se vuelve a enlazar al
+          bloque compartido por su nombre.
+    """
+
+    def __init__(self, ctx, forma, slots=4):
+        self.forma = tuple(forma)
+        self.slots = slots
+        tam = int(np.prod(self.forma)) * slots
+        self._shm = shared_memory.SharedMemory(create=True, size=tam)
+        self.nombre = self._shm.name
+        self.libres = ctx.Queue()
+        self.listos = ctx.Queue()
+        self.descartados = ctx.Value("i", 0)
+        for i in range(slots):
+            self.libres.put(i)
+        self._enlazar()
+
+    def _enlazar(self):
+        self.buffer = np.ndarray((self.slots,) + self.forma, np.uint8,
+                                 buffer=self._shm.buf)
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_shm"]
+        del estado["buffer"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._shm = shared_memory.SharedMemory(name=self.nombre)
+        self._enlazar()
+
+    def frame(self, slot):
+        """
+        np.ndarray: Vista (sin copia) del frame almacenado en `slot`.
+        """
+        return self.buffer[slot]
+
+    def reservar(self, politica=POLITICA_DESCARTAR_ANTIGUO, timeout=0.1):
+        """
+        Obtiene un slot libre donde escribir el siguiente frame.
+
+        Args:
+            politica (str): Qué hacer si el consumidor va por detrás:
+                - "bloquear": espera hasta `timeout` a que se libere un slot.
+                - "descartar_nuevo": no espera; el frame nuevo se descarta.
+                - "descartar_antiguo": reutiliza el frame publicado más antiguo
+                  que aún no se ha consumido.
+            timeout (float): Espera máxima en segundos para "bloquear".
+
+        Returns:
+            int or None: Índice del slot, o None si el frame debe descartarse.
+        """
+        try:
+            return self.libres.get_nowait()
+        except queue.Empty:
+            pass
+
+        if politica == POLITICA_BLOQUEAR:
+            try:
+                return self.libres.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        if politica == POLITICA_DESCARTAR_ANTIGUO:
+            try:
+                slot, _ = self.listos.get_nowait()
+                with self.descartados.get_lock():
+                    self.descartados.value += 1
+                return slot
+            except queue.Empty:
+                pass
+
+        with self.descartados.get_lock():
+            self.descartados.value += 1
+        return None
+
+    def publicar(self, slot, meta):
+        """
+        Marca un slot como listo para el consumidor junto con sus metadatos.
+        """
+        self.listos.put((slot, meta))
+
+    def obtener(self, timeout=0.1):
+        """
+        Devuelve el siguiente slot publicado como (slot, meta), o None si no
+        llega ninguno antes de `timeout`.
+        """
+        try:
+            return self.listos.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def liberar(self, slot):
+        """
+        Devuelve un slot consumido a la lista de libres.
+        """
+        self.libres.put(slot)
+
+    def cerrar_productor(self):
+        """
+        Indica al consumidor que no habrá más frames.
+        """
+        self.listos.put((None, FIN))
+
+    def cerrar(self, destruir=False):
+        """
+        Libera la memoria compartida; el proceso que la creó debe destruirla.
+        """
+        del self.buffer
+        self._shm.close()
+        if destruir:
+            self._shm.unlink()
+
+
+def etapa_captura(anillo, parar, fuente, ancho, alto, politica, max_frames=None):
+    """
+    Proceso de captura: lee la cámara y publica los frames en el anillo.
+
+    Args:
+        fuente (int or str): Índice de la cámara, o FUENTE_SINTETICA para generar
+                             frames con `benchmark_sintetico.GeneradorSintetico`.
+        max_frames (int or None): Número de frames tras el que se termina.
+
+    Function Details:
+        - Solicita la resolución configurada y reescala si la cámara entrega otra.
+        - Escribe directamente en la vista del slot de memoria compartida.
+        - Aplica la política de descarte cuando los analizadores van por detrás.
+    """
+    cap = None
+    if fuente == FUENTE_SINTETICA:
+        from benchmark_sintetico import GeneradorSintetico
+        generador = GeneradorSintetico(ancho, alto)
+    else:
+        cap = cv2.VideoCapture(fuente)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+    n = 0
+    try:
+        while not parar.is_set() and (max_frames is None or n < max_frames):
+            if cap is None:
+                frame, _ = generador.frame(n)
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+            t = time.time()
+
+            slot = anillo.reservar(politica)
+            if slot is None:
+                continue
+
+            destino = anillo.frame(slot)
+            if frame.shape == destino.shape:
+                np.copyto(destino, frame)
+            else:
+                cv2.resize(frame, (ancho, alto), dst=destino)
+            anillo.publicar(slot, {"n": n, "t_captura": t})
+            n += 1
+    finally:
+        if cap is not None:
+            cap.release()
+        anillo.cerrar_productor()
+        anillo.cerrar()
+
+
+def etapa_analisis(entrada, analizados, fase, siguiente, parar, backend_tracker):
+    """
+    Proceso analizador: parte sin estado de la detección (MediaPipe, búsqueda
+    del cuadrado o segmentación de piel).
+
+    Args:
+        entrada (AnilloFrames): Anillo de frames capturados.
+        analizados: Cola hacia la etapa de estado con (slot, meta, analisis).
+        fase: Valor compartido con el índice en `sesion.FASES` de la fase actual.
+        siguiente: Contador compartido del número de secuencia de consumo.
+        parar: Evento de parada.
+        backend_tracker (str): Backend de seguimiento del modo AirDraw.
+
+    Function Details:
+        - Varios analizadores consumen el mismo anillo; cada frame recibe al
+          tomarse un número de secuencia sin huecos, que la etapa de estado usa
+          para reordenar los resultados.
+        - Ejecuta `sesion.analizar_frame` con la fase publicada por la etapa de
+          estado y deja en el mismo slot el frame resultante (espejo y contorno
+          dibujado), sin copiarlo a otro anillo.
+        - Cada analizador tiene su propio modelo de MediaPipe en modo
+          seguimiento; como recibe uno de cada N frames, el seguimiento recurre
+          a la detección de la palma más a menudo que con un solo proceso.
+        - El backend de seguimiento se construye al arrancar, antes de tomar
+          ningún frame: un nombre no válido detiene el analizador antes de
+          asignar ningún número de secuencia, y el aviso de fin se envía igual.
+        - Un error al analizar un frame se registra y el frame se envía sin
+          análisis, para que la etapa de estado no espere una secuencia que
+          nunca llegará.
+    """
+    import seguridad
+    from backends_tracker import crear_backend
+    from sesion import FASE_SECUENCIA, FASES, analizar_frame
+
+    modelo_manos = None
+    backend = None
+    try:
+        modelo_manos = seguridad.crear_modelo_manos()
+        if backend_tracker == "mediapipe":
+            backend = crear_backend("mediapipe", hands=modelo_manos)
+        else:
+            backend = crear_backend(backend_tracker)
+
+        while not parar.is_set():
+            with siguiente.get_lock():
+                item = entrada.obtener()
+                if item is None:
+                    continue
+                slot, meta = item
+                if slot is None:
+                    # Deja el aviso de fin para el resto de analizadores
+                    entrada.cerrar_productor()
+                    break
+                meta["seq"] = siguiente.value
+                siguiente.value += 1
+
+            fase_actual = FASES[fase.value]
+            vista = entrada.frame(slot)
+            try:
+                modelo = modelo_manos if fase_actual == FASE_SECUENCIA else None
+                frame, analisis = analizar_frame(vista, fase_actual, modelo, backend)
+                if frame is not vista:
+                    np.copyto(vista, frame)
+            except Exception:
+                logging.exception("Error analizando el frame %d", meta["n"])
+                analisis = {"fase": None}
+            analizados.put((slot, meta, analisis))
+    finally:
+        analizados.put((None, FIN, None))
+        if backend is not None:
+            backend.cerrar()
+        if modelo_manos is not None:
+            modelo_manos.close()
+        entrada.cerrar()
+
+
+def etapa_estado(entrada, analizados, salida, fase, parar, politica, num_analizadores,
+                 backend_tracker, autenticado=False):
+    """
+    Proceso de estado: aplica en orden los análisis a una `AirDrawSession`.
+
+    Args:
+        entrada (AnilloFrames): Anillo de frames capturados (ya analizados).
+        analizados: Cola con los (slot, meta, analisis) de los analizadores.
+        salida (AnilloFrames): Anillo hacia el render.
+        fase: Valor compartido donde se publica la fase de la sesión.
+        parar: Evento de parada.
+        politica (str): Política de descarte del anillo de salida.
+        num_analizadores (int): Número de analizadores que enviarán su aviso de fin.
+        backend_tracker (str): Backend de seguimiento de la sesión.
+        autenticado (bool): Empieza directamente en modo AirDraw (solo para medir
+                            el rendimiento con la fuente sintética).
+
+    Function Details:
+        - Reordena los resultados por número de secuencia: el motor de gestos,
+          la confirmación del cuadrado y el filtro de Kalman son secuenciales.
+        - Llama a `AirDrawSession.aplicar`, que dibuja el HUD, los puntos y la
+          trayectoria sobre el frame, y lo copia al anillo del render.
+        - Publica la fase tras cada frame; los frames que se analizaron con la
+          fase anterior durante un cambio no aportan datos.
+        - Si la sesión no puede crearse, cierra igualmente el anillo de salida
+          para que el render termine en lugar de esperar frames.
+    """
+    from sesion import FASES, AirDrawSession
+
+    sesion = None
+    pendientes = {}
+    siguiente = 0
+    activos = num_analizadores
+
+    try:
+        sesion = AirDrawSession("pipeline", None, backend_tracker=backend_tracker,
+                                puerta_movimiento=False)
+        sesion.modo_tracker = autenticado
+        fase.value = FASES.index(sesion.fase)
+
+        while activos and not parar.is_set():
+            try:
+                slot, meta, analisis = analizados.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if slot is None:
+                activos -= 1
+                continue
+
+            pendientes[meta["seq"]] = (slot, meta, analisis)
+            while siguiente in pendientes:
+                slot, meta, analisis = pendientes.pop(siguiente)
+                siguiente += 1
+
+                frame, resultado = sesion.aplicar(entrada.frame(slot), analisis,
+                                                  meta["t_captura"])
+                fase.value = FASES.index(sesion.fase)
+
+                slot_out = salida.reservar(politica)
+                if slot_out is not None:
+                    np.copyto(salida.frame(slot_out), frame)
+                    meta["modo_tracker"] = resultado["modo_tracker"]
+                    meta["medida"] = resultado["medida"]
+                    meta["estimacion"] = resultado["estimacion"]
+                    meta["t_deteccion"] = time.time()
+                    salida.publicar(slot_out, meta)
+                entrada.liberar(slot)
+    finally:
+        if sesion is not None:
+            sesion.cerrar()
+        salida.cerrar_productor()
+        entrada.cerrar()
+        salida.cerrar()
+
+
+def etapa_render(entrada, parar, estadisticas, mostrar=True):
+    """
+    Proceso de render: añade el HUD de rendimiento y muestra la ventana.
+
+    Args:
+        estadisticas: Array compartido [frames, t_primero, t_ultimo] que se
+                      actualiza con cada frame mostrado.
+        mostrar (bool): Si es False no abre ventana (medición de rendimiento).
+
+    Function Details:
+        - La trayectoria y los puntos ya llegan dibujados desde la etapa de estado.
+        - Muestra FPS de salida y la latencia captura → pantalla.
+        - Pulsar q activa el evento `parar` para todas las etapas.
+    """
+    prev_time = time.time()
+    try:
+        while not parar.is_set():
+            item = entrada.obtener()
+            if item is None:
+                if mostrar and cv2.waitKey(1) & 0xFF == ord('q'):
+                    parar.set()
+                continue
+            slot, meta = item
+            if slot is None:
+                break
+
+            current_time = time.time()
+            with estadisticas.get_lock():
+                if estadisticas[0] == 0:
+                    estadisticas[1] = current_time
+                estadisticas[0] += 1
+                estadisticas[2] = current_time
+
+            if mostrar:
+                frame = entrada.frame(slot)
+                fps = 1.0 / max(current_time - prev_time, 1e-6)
+                latencia = (current_time - meta["t_captura"]) * 1000.0
+
+                h, w, _ = frame.shape
+                cv2.putText(frame, f"FPS: {fps:.2f}  Lat: {latencia:.0f} ms",
+                            (w - 420, h - 20), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.7, (255, 255, 255), 2)
+                cv2.imshow("AirDraw Secure", frame)
+            prev_time = current_time
+            entrada.liberar(slot)
+
+            if mostrar and cv2.waitKey(1) & 0xFF == ord('q'):
+                parar.set()
+    finally:
+        if mostrar:
+            cv2.destroyAllWindows()
+        entrada.cerrar()
+
+
+def ejecutar_pipeline(fuente, ancho, alto, slots, politica, backend_tracker,
+                      num_analizadores, max_frames=None, mostrar=True,
+                      autenticado=False):
+    """
+    Lanza las etapas del pipeline y espera a que termine el render.
+
+    Args:
+        fuente (int or str): Cámara o FUENTE_SINTETICA.
+        ancho (int): Ancho de los frames.
+        alto (int): Alto de los frames.
+        slots (int): Slots del anillo hacia el render; el de captura tiene al
+                     menos dos por analizador para que ninguno se quede sin trabajo.
+        politica (str): Política de descarte de ambos anillos.
+        backend_tracker (str): Backend de seguimiento del modo AirDraw.
+        num_analizadores (int): Número de procesos analizadores.
+        max_frames (int or None): Frames a capturar antes de terminar.
+        mostrar (bool): Si es False, el render no abre ventana.
+        autenticado (bool): Empieza en modo AirDraw (ver `etapa_estado`).
+
+    Returns:
+        dict: Frames mostrados, FPS de salida y frames descartados en cada anillo.
+    """
+    from sesion import FASE_TRACKER, FASES
+
+    ctx = mp.get_context("spawn")
+    forma = (alto, ancho, 3)
+    capturados = AnilloFrames(ctx, forma, max(slots, 2 * num_analizadores))
+    procesados = AnilloFrames(ctx, forma, slots)
+    analizados = ctx.Queue()
+    fase = ctx.Value("i", FASES.index(FASE_TRACKER) if autenticado else 0)
+    siguiente = ctx.Value("l", 0)
+    estadisticas = ctx.Array("d", 3)
+    parar = ctx.Event()
+
+    procesos = [ctx.Process(target=etapa_captura, name="captura",
+                            args=(capturados, parar, fuente, ancho, alto, politica,
+                                  max_frames))]
+    procesos += [ctx.Process(target=etapa_analisis, name=f"analisis-{i}",
+                             args=(capturados, analizados, fase, siguiente, parar,
+                                   backend_tracker))
+                 for i in range(num_analizadores)]
+    procesos += [
+        ctx.Process(target=etapa_estado, name="estado",
+                    args=(capturados, analizados, procesados, fase, parar, politica,
+                          num_analizadores, backend_tracker, autenticado)),
+        ctx.Process(target=etapa_render, name="render",
+                    args=(procesados, parar, estadisticas, mostrar)),
+    ]
+    for p in procesos:
+        p.start()
+
+    try:
+        procesos[-1].join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        parar.set()
+        for p in procesos:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        frames, t_primero, t_ultimo = estadisticas[:]
+        resumen = {
+            "frames": int(frames),
+            "fps": (frames - 1) / (t_ultimo - t_primero) if frames > 1 else 0.0,
+            "descartados_captura": capturados.descartados.value,
+            "descartados_render": procesados.descartados.value,
+        }
+        capturados.cerrar(destruir=True)
+        procesados.cerrar(destruir=True)
+    return resumen
+
+
+def medir_escalado(lista_analizadores, ancho, alto, frames, backend_tracker):
+    """
+    Mide el rendimiento del pipeline con distinto número de analizadores.
+
+    Function Details:
+        - Usa la fuente sintética en modo AirDraw, sin ventana y con la política
+          "bloquear", para que el resultado dependa solo del proceso.
+        - Muestra los FPS de salida y la aceleración respecto a la primera
+          configuración. La aceleración está limitada por los núcleos
+          disponibles: captura, estado y render ocupan también el suyo.
+    """
+    print(f"{frames} frames sintéticos de {ancho}x{alto}, backend '{backend_tracker}', "
+          f"{os.cpu_count()} núcleos")
+    print(f"{'analizadores':>12} {'fps':>8} {'acel.':>6} {'desc. cap':>10} {'desc. ren':>10}")
+    base = None
+    for n in lista_analizadores:
+        r = ejecutar_pipeline(FUENTE_SINTETICA, ancho, alto, 4, POLITICA_BLOQUEAR,
+                              backend_tracker, n, frames, mostrar=False, autenticado=True)
+        if base is None:
+            base = r["fps"]
+        aceleracion = f"{r['fps'] / base:6.2f}" if base > 0 else f"{'-':>6}"
+        print(f"{n:>12} {r['fps']:8.1f} {aceleracion} "
+              f"{r['descartados_captura']:>10} {r['descartados_render']:>10}")
+
+
+def main():
+    """
+    Ejecuta AirDraw Secure como un pipeline multiproceso.
+
+    Function Details:
+        - Captura, análisis, estado y render corren en procesos separados, sin
+          compartir el GIL.
+        - El análisis (MediaPipe, búsqueda del cuadrado y segmentación), que es
+          lo caro y no tiene estado, se reparte entre --analizadores procesos
+          que trabajan sobre frames distintos. Una única etapa de estado aplica
+          sus resultados en orden a una `AirDrawSession` (secuencia de gestos,
+          cuadrado y Kalman), así que el rendimiento crece con los núcleos.
+        - Los frames pasan entre etapas por dos anillos de memoria compartida
+          (captura → análisis/estado y estado → render) sin serializarse.
+        - La política de descarte decide qué ocurre si una etapa va por detrás;
+          por defecto se descarta el frame pendiente más antiguo para mantener
+          la latencia acotada.
+        - Con --escalado mide los FPS con cada número de analizadores indicado
+          sobre vídeo sintético, sin cámara ni ventana.
+        - Al terminar muestra el número de frames descartados en cada anillo.
+    """
+    parser = argparse.ArgumentParser(description="AirDraw Secure multiproceso.")
+    parser.add_argument("--camara", type=int, default=0)
+    parser.add_argument("--sintetico", action="store_true",
+                        help="Usa frames sintéticos en lugar de la cámara.")
+    parser.add_argument("--ancho", type=int, default=1920)
+    parser.add_argument("--alto", type=int, default=1080)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--politica", choices=POLITICAS,
+                        default=POLITICA_DESCARTAR_ANTIGUO)
+    parser.add_argument("--backend", choices=list(BACKENDS), default="piel")
+    parser.add_argument("--analizadores", type=int,
+                        default=max(1, (os.cpu_count() or 1) - 3))
+    parser.add_argument("--frames", type=int, default=None)
+    parser.add_argument("--escalado", type=int, nargs="+", default=None,
+                        help="Números de analizadores a comparar.")
+    args = parser.parse_args()
+
+    if args.escalado:
+        medir_escalado(args.escalado, args.ancho, args.alto, args.frames or 300,
+                       args.backend)
+        return
+
+    fuente = FUENTE_SINTETICA if args.sintetico else args.camara
+    r = ejecutar_pipeline(fuente, args.ancho, args.alto, args.slots, args.politica,
+                          args.backend, args.analizadores, args.frames)
+    print(f"Frames mostrados: {r['frames']} ({r['fps']:.1f} fps)")
+    print(f"Frames descartados: captura→análisis {r['descartados_captura']}, "
+          f"estado→render {r['descartados_render']}")
+
+
+if __name__ == "__main__":
+    main()
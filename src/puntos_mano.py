@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# Lateralidad codificada como entero (MediaPipe asume imagen en espejo)
+MANO_DERECHA = 1
+MANO_IZQUIERDA = -1
+
+# Índices de las puntas y de las articulaciones con las que se comparan
+PUNTA_PULGAR = 4
+ARTICULACION_PULGAR = 3
+PUNTAS_DEDOS = np.array([8, 12, 16, 20])
+ARTICULACIONES_DEDOS = PUNTAS_DEDOS - 2
+
+# Conexiones de la mano (mismas que mp_hands.HAND_CONNECTIONS) agrupadas en
+# trazos continuos para dibujarlas con una sola llamada a cv2.polylines
+TRAZOS_MANO = (
+    np.array([0, 1, 2, 3, 4]),
+    np.array([5, 6, 7, 8]),
+    np.array([9, 10, 11, 12]),
+    np.array([13, 14, 15, 16]),
+    np.array([17, 18, 19, 20]),
+    np.array([0, 5, 9, 13, 17, 0]),
+)
+
+COLOR_CONEXIONES = (224, 224, 224)
+COLOR_PUNTOS = (0, 0, 255)
+
+
+def desde_landmarks(hand_landmarks):
+    """
+    Convierte los landmarks protobuf de una mano en un array (21, 3).
+
+    Args:
+        hand_landmarks (NormalizedLandmarkList): Landmarks de una mano de MediaPipe.
+
+    Returns:
+        np.ndarray: Array float32 (21, 3) con las coordenadas normalizadas (x, y, z).
+    """
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark],
+                    np.float32)
+
+
+def desde_resultados(resultados):
+    """
+    Convierte una única vez el resultado de MediaPipe Hands en arrays de NumPy.
+
+    Args:
+        resultados: Objeto devuelto por `hands.process()`.
+
+    Returns:
+        tuple:
+            - puntos (np.ndarray): Array float32 de forma (manos, 21, 3) con las
+              coordenadas normalizadas (x, y, z) de cada landmark.
+            - lateralidad (np.ndarray): Array int8 de forma (manos,) con
+              MANO_DERECHA o MANO_IZQUIERDA.
+
+    Function Details:
+        - Recorre los landmarks protobuf una sola vez por mano; el resto del
+          pipeline (conteo de dedos y dibujo) trabaja sobre el array.
+        - Si no hay manos devuelve arrays vacíos con la forma correcta.
+    """
+    manos = resultados.multi_hand_landmarks
+    if not manos:
+        return (np.empty((0, NUM_LANDMARKS, 3), np.float32),
+                np.empty((0,), np.int8))
+
+    puntos = np.stack([desde_landmarks(mano) for mano in manos])
+
+    lateralidad = np.full(len(manos), MANO_DERECHA, np.int8)
+    if resultados.multi_handedness:
+        for i, clasificacion in enumerate(resultados.multi_handedness[:len(manos)]):
+            if clasificacion.classification[0].label == "Left":
+                lateralidad[i] = MANO_IZQUIERDA
+
+    return puntos, lateralidad
+
+
+def contar_dedos_manos(puntos, lateralidad):
+    """
+    Cuenta los dedos levantados de todas las manos a la vez.
+
+    Args:
+        puntos (np.ndarray): Array (manos, 21, 3) devuelto por `desde_resultados`.
+        lateralidad (np.ndarray): Array (manos,) con la lateralidad de cada mano.
+
+    Returns:
+        np.ndarray: Array int de forma (manos,) con los dedos levantados (0-5).
+
+    Function Details:
+        - Pulgar: compara la coordenada x de la punta con la de la articulación
+          anterior. En la imagen en espejo el pulgar de la mano derecha se abre
+          hacia la izquierda (x menor) y el de la izquierda hacia la derecha.
+        - Resto de dedos: la punta debe estar por encima (y menor) de la
+          articulación proximal.
+    """
+    pulgar = ((puntos[:, ARTICULACION_PULGAR, 0] - puntos[:, PUNTA_PULGAR, 0])
+              * lateralidad) > 0
+    dedos = puntos[:, PUNTAS_DEDOS, 1] < puntos[:, ARTICULACIONES_DEDOS, 1]
+    return pulgar.astype(np.int32) + dedos.sum(axis=1)
+
+
+def dibujar_manos(frame, puntos, radio=2):
+    """
+    Dibuja el esqueleto de todas las manos a partir del array de landmarks.
+
+    Args:
+        frame (np.ndarray): Imagen BGR sobre la que se dibuja.
+        puntos (np.ndarray): Array (manos, 21, 3) con coordenadas normalizadas.
+        radio (int): Semilado en píxeles del marcador de cada landmark.
+
+    Returns:
+        None
+
+    Function Details:
+        - Escala todas las coordenadas a píxeles en una sola operación.
+        - Dibuja todas las conexiones de todas las manos con una única llamada
+          a cv2.polylines.
+        - Pinta los landmarks como pequeños cuadrados mediante indexado de
+          NumPy, sin una llamada de OpenCV por punto.
+    """
+    if len(puntos) == 0:
+        return
+
+    h, w = frame.shape[:2]
+    pix = np.rint(puntos[:, :, :2] * (w, h)).astype(np.int32)
+
+    trazos = [mano[trazo] for mano in pix for trazo in TRAZOS_MANO]
+    cv2.polylines(frame, trazos, False, COLOR_CONEXIONES, 2)
+
+    desplazamientos = np.arange(-radio, radio + 1)
+    xs = (pix[:, :, 0].reshape(-1, 1, 1) + desplazamientos.reshape(1, 1, -1))
+    ys = (pix[:, :, 1].reshape(-1, 1, 1) + desplazamientos.reshape(1, -1, 1))
+    xs, ys = np.broadcast_arrays(xs, ys)
+    validos = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    frame[ys[validos], xs[validos]] = COLOR_PUNTOS
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+FUENTE = cv2.FONT_HERSHEY_SIMPLEX
+MAX_SPRITES = 256
+
+
+class CacheSprites:
+    """
+    Caché LRU de textos pre-renderizados como sprites.
+
+    Args:
+        max_sprites (int): Número máximo de sprites guardados.
+
+    Function Details:
+        - La clave es (texto, escala, color, grosor, fondo): la primera vez se
+          calcula el tamaño y se rasteriza con `cv2.putText`; después pegar el
+          texto es una copia de un bloque de píxeles.
+        - Con fondo, el sprite es opaco y se copia entero (mismo recuadro que
+          `seguridad.dibujar_texto`). Sin fondo, se guarda la cobertura (alfa)
+          de cada píxel para mezclar el color del texto con el vídeo, respetando
+          el suavizado de los bordes.
+        - Es segura entre hilos: el hilo de proceso y el de render la comparten.
+    """
+
+    def __init__(self, max_sprites=MAX_SPRITES):
+        self.max_sprites = max_sprites
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, texto, font_scale, color, thickness, bg_color):
+        clave = (texto, font_scale, color, thickness, bg_color)
+        with self._lock:
+            sprite = self._sprites.get(clave)
+            if sprite is not None:
+                self._sprites.move_to_end(clave)
+                return sprite
+
+        sprite = _rasterizar(texto, font_scale, color, thickness, bg_color)
+        with self._lock:
+            self._sprites[clave] = sprite
+            if len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        return sprite
+
+
+def _rasterizar(texto, font_scale, color, thickness, bg_color):
+    """
+    Dibuja un texto en un sprite propio.
+
+    Returns:
+        tuple: (imagen, alfa, dx, dy). Si el sprite es opaco, `imagen` es el
+               recuadro BGR y `alfa` es None; si no, `imagen` es un bloque del
+               color del texto y `alfa` el par de pesos float32 (fondo, texto)
+               de cada píxel para `cv2.blendLinear`.
+               (dx, dy) es el desplazamiento de su esquina superior izquierda
+               respecto a la posición del texto.
+    """
+    (w, h), base = cv2.getTextSize(texto, FUENTE, font_scale, thickness)
+    if bg_color is not None:
+        margen = 10
+        alto, ancho = h + 2 * margen + 1, w + 2 * margen + 1
+        imagen = np.empty((alto, ancho, 3), np.uint8)
+        imagen[:] = bg_color
+        cv2.putText(imagen, texto, (margen, h + margen), FUENTE, font_scale,
+                    color, thickness)
+        return imagen, None, -margen, -h - margen
+
+    margen = thickness
+    alto, ancho = h + base + 2 * margen, w + 2 * margen
+    cobertura = np.zeros((alto, ancho), np.uint8)
+    cv2.putText(cobertura, texto, (margen, h + margen), FUENTE, font_scale,
+                255, thickness)
+    peso_texto = cobertura.astype(np.float32) / 255.0
+    imagen = np.empty((alto, ancho, 3), np.uint8)
+    imagen[:] = color
+    return imagen, (1.0 - peso_texto, peso_texto), -margen, -h - margen
+
+
+cache = CacheSprites()
+
+
+def pegar_texto(frame, texto, posicion, color=(255, 255, 255), font_scale=1.0,
+                thickness=2, bg_color=None):
+    """
+    Pega un texto pre-renderizado sobre el frame.
+
+    Args:
+        frame (np.ndarray): Imagen BGR destino.
+        texto (str): Texto a mostrar.
+        posicion (tuple): Coordenadas (x, y) de la línea base del texto, como
+                          en `cv2.putText`.
+        color (tuple): Color BGR del texto.
+        font_scale (float): Escala de la fuente.
+        thickness (int): Grosor de las letras.
+        bg_color (tuple or None): Color del recuadro de fondo, o None sin fondo.
+
+    Returns:
+        None
+
+    Function Details:
+        - Obtiene el sprite de la caché y lo copia recortándolo a los límites
+          del frame.
+    """
+    imagen, alfa, dx, dy = cache.obtener(texto, font_scale, tuple(color),
+                                            thickness,
+                                            None if bg_color is None else tuple(bg_color))
+    alto, ancho = imagen.shape[:2]
+    H, W = frame.shape[:2]
+    x0, y0 = posicion[0] + dx, posicion[1] + dy
+    x1, y1 = x0 + ancho, y0 + alto
+    fx0, fy0, fx1, fy1 = max(x0, 0), max(y0, 0), min(x1, W), min(y1, H)
+    if fx0 >= fx1 or fy0 >= fy1:
+        return
+
+    recorte = (slice(fy0 - y0, fy1 - y0), slice(fx0 - x0, fx1 - x0))
+    destino = frame[fy0:fy1, fx0:fx1]
+    if alfa is None:
+        destino[:] = imagen[recorte]
+    else:
+        destino[:] = cv2.blendLinear(destino, imagen[recorte],
+                                     np.ascontiguousarray(alfa[0][recorte]),
+                                     np.ascontiguousarray(alfa[1][recorte]))
+
+
+class HiloRender:
+    """
+    Hilo de render que muestra los frames al ritmo de la pantalla.
+
+    Args:
+        ventana (str): Nombre de la ventana de OpenCV.
+        fps_pantalla (float): Frecuencia máxima de refresco de la ventana.
+
+    Function Details:
+        - `publicar()` solo sustituye el último frame pendiente, por lo que el
+          bucle de proceso nunca espera a `imshow` ni a `waitKey`.
+        - El hilo compone sobre el frame los textos del HUD recibidos (sprites
+          cacheados), lo muestra y atiende el teclado. Si llega más de un frame
+          entre dos refrescos, solo se muestra el más reciente.
+        - Pulsar q activa el evento `parar`.
+        - Toda la interacción con HighGUI ocurre en este hilo. En plataformas que
+          exigen usar la interfaz desde el hilo principal (macOS), el bucle de
+          proceso debe ejecutarse en otro hilo.
+    """
+
+    def __init__(self, ventana, fps_pantalla=60.0):
+        self.ventana = ventana
+        self.periodo = 1.0 / fps_pantalla
+        self.parar = threading.Event()
+        self.mostrados = 0
+        self.sustituidos = 0
+        self._pendiente = None
+        self._condicion = threading.Condition()
+        self._hilo = None
+
+    def publicar(self, frame, hud=()):
+        """
+        Entrega un frame para mostrar sin bloquear.
+
+        Args:
+            frame (np.ndarray): Frame BGR; no debe modificarse después.
+            hud (iterable): Textos a componer, como tuplas con los argumentos
+                            de `pegar_texto` a partir de `texto`.
+        """
+        with self._condicion:
+            if self._pendiente is not None:
+                self.sustituidos += 1
+            self._pendiente = (frame, tuple(hud))
+            self._condicion.notify()
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._ejecutar, name="airdraw-render",
+                                      daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self.parar.set()
+        with self._condicion:
+            self._condicion.notify()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _ejecutar(self):
+        siguiente = time.perf_counter()
+        try:
+            while not self.parar.is_set():
+                with self._condicion:
+                    if self._pendiente is None:
+                        self._condicion.wait(timeout=self.periodo)
+                    item, self._pendiente = self._pendiente, None
+
+                if item is not None:
+                    frame, hud = item
+                    for texto in hud:
+                        pegar_texto(frame, *texto)
+                    cv2.imshow(self.ventana, frame)
+                    self.mostrados += 1
+
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.parar.set()
+
+                siguiente += self.periodo
+                espera = siguiente - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    siguiente = time.perf_counter()
+        finally:
+            cv2.destroyAllWindows()
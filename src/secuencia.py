@@ -0,0 +1,190 @@
+from collections import namedtuple
+
+# Número de símbolos posibles: dedos levantados de 0 a 5
+NUM_SIMBOLOS = 6
+
+# Tipos de evento emitidos por el motor
+EVENTO_AVANCE = "avance"
+EVENTO_REINICIO = "reinicio"
+EVENTO_DESBLOQUEO = "desbloqueo"
+
+EventoSecuencia = namedtuple(
+    "EventoSecuencia", ["tipo", "valor", "progreso", "usuario", "t"]
+)
+
+# Acciones internas de la tabla de transiciones
+_IGNORAR = 0
+_AVANZAR = 1
+_REINICIAR = 2
+_COMPLETAR = 3
+
+
+def compilar_secuencias(codigos):
+    """
+    Compila uno o varios códigos de desbloqueo en una tabla de transiciones.
+
+    Args:
+        codigos (dict): Diccionario {usuario: secuencia}, donde cada secuencia
+                        es una lista de enteros entre 0 y NUM_SIMBOLOS - 1.
+
+    Returns:
+        tuple:
+            - tabla (list): Lista plana de tamaño n_estados * NUM_SIMBOLOS con
+              pares (estado_siguiente, accion, usuario).
+            - prefijos (list): Progreso (tupla de valores) asociado a cada estado.
+
+    Function Details:
+        - Construye un árbol de prefijos con todas las secuencias; cada nodo es
+          un estado y el estado 0 corresponde a "esperando inicio".
+        - Para cada estado y cada símbolo precalcula la transición:
+            - Si el símbolo continúa algún código, avanza (o completa el código
+              si llega al final de una secuencia).
+            - Si repite el último valor aceptado, se ignora (mismo gesto mantenido).
+            - En otro caso reinicia al estado 0, igual que la secuencia original.
+        - Un código que sea prefijo de otro se completa antes de que el más
+          largo pueda alcanzarse, por lo que se rechaza.
+    """
+    if not codigos:
+        raise ValueError("Se necesita al menos un código de desbloqueo.")
+
+    hijos = [{}]
+    prefijos = [()]
+    terminales = {}
+
+    for usuario, secuencia in codigos.items():
+        secuencia = tuple(int(v) for v in secuencia)
+        if not secuencia:
+            raise ValueError(f"El código de '{usuario}' está vacío.")
+        for v in secuencia:
+            if not 0 <= v < NUM_SIMBOLOS:
+                raise ValueError(f"Valor fuera de rango en el código de '{usuario}': {v}")
+
+        estado = 0
+        for v in secuencia:
+            if estado in terminales:
+                raise ValueError(
+                    f"El código de '{usuario}' contiene como prefijo el de "
+                    f"'{terminales[estado]}'.")
+            siguiente = hijos[estado].get(v)
+            if siguiente is None:
+                siguiente = len(hijos)
+                hijos[estado][v] = siguiente
+                hijos.append({})
+                prefijos.append(prefijos[estado] + (v,))
+            estado = siguiente
+
+        if estado in terminales:
+            raise ValueError(
+                f"Los usuarios '{terminales[estado]}' y '{usuario}' comparten código.")
+        if hijos[estado]:
+            raise ValueError(f"El código de '{usuario}' es prefijo de otro código.")
+        terminales[estado] = usuario
+
+    tabla = []
+    for estado, prefijo in enumerate(prefijos):
+        ultimo = prefijo[-1] if prefijo else None
+        for v in range(NUM_SIMBOLOS):
+            siguiente = hijos[estado].get(v)
+            if siguiente is not None:
+                if siguiente in terminales:
+                    tabla.append((0, _COMPLETAR, terminales[siguiente]))
+                else:
+                    tabla.append((siguiente, _AVANZAR, None))
+            elif v == ultimo:
+                tabla.append((estado, _IGNORAR, None))
+            else:
+                tabla.append((0, _REINICIAR, None))
+
+    return tabla, prefijos
+
+
+class MotorSecuencia:
+    """
+    Motor de secuencias de gestos basado en una tabla de transiciones compilada.
+
+    Function Details:
+        - Cada paso es una consulta O(1) en la tabla generada por `compilar_secuencias`.
+        - El antirrebote se hace con marcas de tiempo: un valor debe mantenerse
+          `umbral_estabilidad` segundos para aceptarse y, tras aceptarlo, se espera
+          `enfriamiento` segundos adicionales antes de volver a evaluar.
+        - No imprime nada: devuelve eventos `EventoSecuencia` que el llamador
+          puede mostrar, registrar o reenviar.
+    """
+
+    def __init__(self, codigos, umbral_estabilidad=1.0, enfriamiento=1.5):
+        self.tabla, self.prefijos = compilar_secuencias(codigos)
+        self.umbral_estabilidad = umbral_estabilidad
+        self.enfriamiento = enfriamiento
+        self.reiniciar()
+
+    def reiniciar(self):
+        """
+        Vuelve al estado inicial y descarta el valor en observación.
+        """
+        self.estado = 0
+        self.ultimo_valor = None
+        self.tiempo_inicio_valor = 0.0
+
+    @property
+    def progreso(self):
+        """
+        tuple: Valores aceptados hasta el momento en la secuencia en curso.
+        """
+        return self.prefijos[self.estado]
+
+    def paso(self, valor, t=0.0):
+        """
+        Aplica un valor ya aceptado a la tabla de transiciones.
+
+        Args:
+            valor (int): Número de dedos levantados.
+            t (float): Marca de tiempo asociada al valor.
+
+        Returns:
+            EventoSecuencia or None: Evento generado, o None si el valor se ignora.
+        """
+        if valor is None or not 0 <= valor < NUM_SIMBOLOS:
+            return None
+
+        siguiente, accion, usuario = self.tabla[self.estado * NUM_SIMBOLOS + valor]
+        if accion == _IGNORAR:
+            return None
+
+        if accion == _COMPLETAR:
+            progreso = self.prefijos[self.estado] + (valor,)
+            self.estado = siguiente
+            return EventoSecuencia(EVENTO_DESBLOQUEO, valor, progreso, usuario, t)
+
+        self.estado = siguiente
+        tipo = EVENTO_AVANCE if accion == _AVANZAR else EVENTO_REINICIO
+        return EventoSecuencia(tipo, valor, self.prefijos[siguiente], None, t)
+
+    def observar(self, valor, t):
+        """
+        Procesa el valor detectado en un frame aplicando el antirrebote temporal.
+
+        Args:
+            valor (int or None): Dedos detectados en el frame, o None si no hay mano.
+            t (float): Marca de tiempo del frame en segundos.
+
+        Returns:
+            EventoSecuencia or None: Evento generado si el valor se ha aceptado.
+
+        Function Details:
+            - Si el valor cambia, reinicia el temporizador de estabilidad.
+            - Si el valor se mantiene más de `umbral_estabilidad`, lo acepta
+              con `paso` y aplica el enfriamiento.
+        """
+        if valor is None:
+            return None
+
+        if valor != self.ultimo_valor:
+            self.ultimo_valor = valor
+            self.tiempo_inicio_valor = t
+            return None
+
+        if t - self.tiempo_inicio_valor > self.umbral_estabilidad:
+            self.tiempo_inicio_valor = t + self.enfriamiento
+            return self.paso(valor, t)
+
+        return None
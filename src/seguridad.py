@@ -1,24 +1,23 @@
 import cv2
 import mediapipe as mp
 import time
-from colorama import Fore, Style, init
-
-init(autoreset=True)
+from collections import deque
+from secuencia import MotorSecuencia, EventoSecuencia, EVENTO_DESBLOQUEO
+import puntos_mano
+import render
 
 #VARIABLES
 mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
 
 SECUENCIA = [3, 2, 1, 5]
-mem = []
-desbloqueado = False
-cuadrado_detectado = False
-contador_cuadrado = 0
+CODIGOS = {"usuario": SECUENCIA}
 FRAMES_CONFIRMACION = 8
 
-ultimo_valor = None
-tiempo_inicio_valor = 0
+# Evento emitido al confirmar el cuadrado (segunda fase completada)
+EVENTO_CUADRADO = "cuadrado"
+
 UMBRAL_ESTABILIDAD = 1.0
+ENFRIAMIENTO = 1.5
 
 COLOR_FONDO = (40, 40, 40)
 COLOR_TEXTO_PRINCIPAL = (0, 255, 0)
@@ -26,96 +25,76 @@ COLOR_TEXTO_SECUNDARIO = (255, 255, 0)
 COLOR_VALIDADO = (0, 255, 100)
 COLOR_ALERTA = (0, 0, 255)
 
-hands = None
-
-#FUNCIONES
+#ESTADO
 
-def inicializar_detector():
+class EstadoSeguridad:
     """
-    Inicializa el modelo de detección de manos de Mediapipe.
+    Estado de autenticación de un usuario frente a una cámara.
 
     Args:
-        None
-
-    Returns:
-        None
+        codigos (dict or None): Códigos {usuario: secuencia}; por defecto CODIGOS.
 
     Function Details:
-        - Crea una instancia global del modelo mp.solutions.hands.Hands.
-        - Establece umbrales de confianza para la detección y el seguimiento.
-        - Permite posteriormente analizar frames con hands.process().
+        - Agrupa el motor de secuencias, los eventos emitidos, el progreso de la
+          validación del cuadrado y los últimos landmarks detectados.
+        - Permite que varias sesiones compartan el mismo proceso sin pisarse.
     """
-    global hands
-    hands = mp_hands.Hands(min_detection_confidence=0.7,
-                           min_tracking_confidence=0.6)
-
 
-def contar_dedos(hand_landmarks):
-    """
-    Cuenta la cantidad de dedos levantados en una mano detectada.
+    def __init__(self, codigos=None):
+        self.motor = MotorSecuencia(codigos or CODIGOS, UMBRAL_ESTABILIDAD, ENFRIAMIENTO)
+        self.eventos = deque(maxlen=64)
+        self.desbloqueado = False
+        self.usuario_desbloqueado = None
+        self.cuadrado_detectado = False
+        self.contador_cuadrado = 0
+        self.puntos_manos = None
+        self.lateralidad_manos = None
+
+    @property
+    def completado(self):
+        """
+        bool: True si se han superado las dos fases de la autenticación.
+        """
+        return self.desbloqueado and self.cuadrado_detectado
+
+    def registrar_evento(self, evento):
+        """
+        Registra un evento de la secuencia y actualiza el estado de desbloqueo.
+
+        Args:
+            evento (EventoSecuencia or None): Evento devuelto por el motor.
+
+        Returns:
+            bool: True si el evento completa un código de desbloqueo.
+        """
+        if evento is None:
+            return False
+
+        self.eventos.append(evento)
+        if evento.tipo == EVENTO_DESBLOQUEO:
+            self.desbloqueado = True
+            self.usuario_desbloqueado = evento.usuario
+            return True
+        return False
 
-    Args:
-        hand_landmarks (mediapipe.framework.formats.landmark_pb2.NormalizedLandmarkList):
-            Lista de landmarks de la mano detectada por Mediapipe.
 
-    Returns:
-        int: Número de dedos levantados (0-5).
+#FUNCIONES
 
-    Function Details:
-        - Evalúa el dedo pulgar comparando posiciones horizontales (x).
-        - Evalúa los otros dedos comparando posiciones verticales (y).
-        - Considera un dedo “levantado” si la punta está por encima de la articulación proximal.
-        - Retorna el número total de dedos levantados.
+def crear_modelo_manos(static_image_mode=False):
     """
-    dedos = 0
-    tips = [4, 8, 12, 16, 20]
-    lm = hand_landmarks.landmark
-    if lm[tips[0]].x < lm[tips[0] - 1].x:
-        dedos += 1
-    for i in range(1, 5):
-        if lm[tips[i]].y < lm[tips[i] - 2].y:
-            dedos += 1
-    return dedos
-
-
-def actualizar_secuencia(valor):
-    """
-    Gestiona y valida la secuencia de gestos de desbloqueo basada en el número de dedos levantados.
+    Crea un modelo de detección de manos de Mediapipe con los umbrales del sistema.
 
     Args:
-        valor (int): Número de dedos levantados detectado actualmente.
+        static_image_mode (bool): Si es True, cada frame se analiza de forma
+                                  independiente y el modelo puede compartirse
+                                  entre varias cámaras.
 
     Returns:
-        bool: 
-            - True si la secuencia completa (3-2-1-5) fue correctamente realizada.
-            - False en cualquier otro caso.
-
-    Function Details:
-        - Añade los valores de dedos detectados en orden a la lista mem.
-        - Compara mem con la secuencia esperada SECUENCIA.
-        - Si coincide, establece desbloqueado = True e imprime un mensaje de confirmación.
-        - Si se detecta un valor incorrecto, reinicia la secuencia.
-        - Muestra en consola el progreso actual de la secuencia.
+        mp.solutions.hands.Hands: Modelo listo para usar con process().
     """
-    global mem, desbloqueado
-
-    if valor is None:
-        return False
-
-    if len(mem) == 0 or valor != mem[-1]:
-        mem.append(valor)
-        if mem == SECUENCIA:
-            desbloqueado = True
-            print(Fore.GREEN + Style.BRIGHT +
-                  "\nSECUENCIA CORRECTA: Sistema DESBLOQUEADO\n")
-            mem.clear()
-            return True
-        if mem[-1] != SECUENCIA[len(mem) - 1]:
-            print(Fore.RED + "Secuencia incorrecta. Reiniciando.")
-            mem = []
-    progreso = " - ".join(str(n) for n in mem) if mem else "Esperando inicio..."
-    print(Fore.CYAN + f"Progreso: {progreso}")
-    return False
+    return mp_hands.Hands(static_image_mode=static_image_mode,
+                          min_detection_confidence=0.7,
+                          min_tracking_confidence=0.6)
 
 
 def dibujar_texto(frame, texto, posicion=(30, 80), color=(255, 255, 255),
@@ -136,29 +115,25 @@ def dibujar_texto(frame, texto, posicion=(30, 80), color=(255, 255, 255),
         None
 
     Function Details:
-        - Calcula el tamaño del texto a renderizar.
-        - Dibuja un rectángulo sólido detrás del texto para mejorar la visibilidad.
-        - Superpone el texto sobre el frame usando `cv2.putText`.
+        - Usa un sprite pre-renderizado (texto sobre un rectángulo sólido) de la
+          caché de `render`, indexado por texto, escala, colores y grosor.
+        - Solo la primera aparición de cada texto calcula su tamaño y lo dibuja;
+          las siguientes copian el bloque de píxeles sobre el frame.
     """
-    x, y = posicion
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    (w, h), _ = cv2.getTextSize(texto, font, font_scale, thickness)
-    cv2.rectangle(frame, (x - 10, y - h - 10),
-                  (x + w + 10, y + 10), bg_color, -1)
-    cv2.putText(frame, texto, (x, y), font, font_scale, color, thickness)
+    render.pegar_texto(frame, texto, posicion, color, font_scale, thickness,
+                       bg_color)
 
 
-def detectar_cuadrado(frame):
+def buscar_cuadrado(frame):
     """
-    Busca y valida la presencia de un cuadrado en la imagen.
+    Busca un cuadrado en la imagen y devuelve su contorno.
 
     Args:
         frame (numpy.ndarray): Frame actual de la cámara en formato BGR.
 
     Returns:
-        bool: 
-            - True si se detecta un cuadrado.
-            - False en caso contrario.
+        numpy.ndarray or None: Contorno aproximado de 4 vértices del cuadrado,
+        o None si no se encuentra ninguno.
 
     Function Details:
         - Convierte la imagen a escala de grises y aplica suavizado gaussiano.
@@ -168,7 +143,7 @@ def detectar_cuadrado(frame):
             - Si tiene 4 vértices, es convexo y tiene una proporción (w/h) cercana a 1,
               lo considera cuadrado.
             - Debe además tener un área dentro de un rango específico.
-        - Dibuja el cuadrado encontrado sobre el frame y devuelve True.
+        - Devuelve el primer contorno que cumple las condiciones.
     """
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -183,83 +158,175 @@ def detectar_cuadrado(frame):
             area = cv2.contourArea(approx)
             aspect_ratio = w / float(h)
             if 0.9 < aspect_ratio < 1.1 and 3000 < area < 80000:
-                cv2.drawContours(frame, [approx], -1, (255, 255, 0), 3)
-                return True
-    return False
+                return approx
+    return None
 
 
-def procesar_frame(frame):
+def analizar_frame(frame, modelo_manos, fase_cuadrado=False, escala=1.0):
     """
-    Procesa cada frame de la cámara para controlar el flujo de seguridad y desbloqueo.
+    Parte sin estado del procesamiento de seguridad: espejo, MediaPipe o
+    búsqueda del cuadrado.
 
     Args:
         frame (numpy.ndarray): Frame actual leído desde la cámara.
+        modelo_manos: Modelo de Mediapipe Hands, o None para no ejecutarlo (se
+                      reutilizarán los últimos landmarks del estado).
+        fase_cuadrado (bool): Si es True (secuencia ya completada), busca el
+                              cuadrado en lugar de ejecutar MediaPipe.
+        escala (float): Reducción del frame que se entrega a MediaPipe; los
+                        landmarks son normalizados y no dependen de ella.
+
+    Returns:
+        tuple:
+            - frame (numpy.ndarray): Frame invertido horizontalmente (espejo).
+            - analisis (dict): "manos" con (puntos, lateralidad) o None si no se
+              ha ejecutado MediaPipe, y "cuadrado" con el contorno o None.
+
+    Function Details:
+        - No lee ni modifica ningún `EstadoSeguridad`, por lo que varios procesos
+          pueden analizar frames distintos a la vez (ver pipeline.py).
+    """
+    frame = cv2.flip(frame, 1)
+    analisis = {"manos": None, "cuadrado": None}
+
+    if fase_cuadrado:
+        analisis["cuadrado"] = buscar_cuadrado(frame)
+    elif modelo_manos is not None:
+        entrada = frame
+        if escala < 1.0:
+            entrada = cv2.resize(frame, None, fx=escala, fy=escala,
+                                 interpolation=cv2.INTER_AREA)
+        frame_rgb = cv2.cvtColor(entrada, cv2.COLOR_BGR2RGB)
+        analisis["manos"] = puntos_mano.desde_resultados(modelo_manos.process(frame_rgb))
+
+    return frame, analisis
+
+
+def aplicar_analisis(frame, estado, analisis, t=None, dibujar=True,
+                     dibujar_landmarks=True):
+    """
+    Parte con estado del procesamiento de seguridad: secuencia, confirmación del
+    cuadrado y anotaciones.
+
+    Args:
+        frame (numpy.ndarray): Frame ya invertido por `analizar_frame`.
+        estado (EstadoSeguridad): Estado de autenticación de esta cámara.
+        analisis (dict): Resultado de `analizar_frame` para este frame.
+        t (float or None): Marca de tiempo del frame para el antirrebote; por
+                           defecto, la hora actual.
+        dibujar (bool): Si es False, no dibuja landmarks ni textos (modo servicio).
+        dibujar_landmarks (bool): Si es False no se dibuja el esqueleto de la mano.
 
     Returns:
         numpy.ndarray: Frame procesado con anotaciones y estados visuales del proceso.
 
     Function Details:
-        - Invierte la imagen horizontalmente para simular un espejo.
-        - Convierte el frame a RGB y se lo pasa a Mediapipe para la detección de manos.
+        - Si el análisis no trae landmarks, reutiliza los guardados en
+          `estado.puntos_manos` y `estado.lateralidad_manos`; el motor de
+          secuencias recibe igualmente el valor con la marca de tiempo actual, de
+          modo que el gesto mantenido sigue contando para el umbral de estabilidad.
         - Si aún no está desbloqueado:
-            - Detecta la cantidad de dedos levantados y actualiza la secuencia de desbloqueo.
+            - Detecta la cantidad de dedos levantados y la pasa al motor de secuencias,
+              que aplica el antirrebote temporal y emite eventos estructurados.
             - Dibuja los landmarks de las manos y muestra el progreso del gesto.
         - Si la secuencia se completó:
             - Pide al usuario mostrar un cuadrado frente a la cámara.
-            - Verifica su presencia durante varios frames consecutivos.
-            - Cuando se cumple la condición, marca `cuadrado_detectado = True`.
-        - Devuelve el frame anotado, listo para mostrar en pantalla por el bucle principal.
+            - Verifica su presencia durante varios frames consecutivos. Solo
+              cuentan las búsquedas reales: la confirmación existe para descartar
+              falsos positivos aislados de Canny, y un análisis sin búsqueda
+              (por ejemplo, hecho antes de cambiar de fase) cuenta como fallo.
+            - Cuando se cumple la condición, marca `estado.cuadrado_detectado = True`
+              y añade un evento EVENTO_CUADRADO a `estado.eventos`.
     """
-    global ultimo_valor, tiempo_inicio_valor, desbloqueado
-    global cuadrado_detectado, contador_cuadrado
+    if t is None:
+        t = time.time()
 
-    frame = cv2.flip(frame, 1)
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    resultados = hands.process(frame_rgb)
+    if analisis["manos"] is not None:
+        estado.puntos_manos, estado.lateralidad_manos = analisis["manos"]
     dedos_levantados = None
 
     # Secuencia de dedos
-    if not desbloqueado:
-        if resultados.multi_hand_landmarks:
-            for hand_landmarks in resultados.multi_hand_landmarks:
-                dedos_levantados = contar_dedos(hand_landmarks)
-                mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-
-        now = time.time()
-        if dedos_levantados is not None:
-            if dedos_levantados != ultimo_valor:
-                ultimo_valor = dedos_levantados
-                tiempo_inicio_valor = now
-            elif now - tiempo_inicio_valor > UMBRAL_ESTABILIDAD:
-                actualizar_secuencia(dedos_levantados)
-                tiempo_inicio_valor = now + 1.5
+    if not estado.desbloqueado:
+        puntos_manos = estado.puntos_manos
+        if puntos_manos is not None and len(puntos_manos):
+            dedos = puntos_mano.contar_dedos_manos(puntos_manos, estado.lateralidad_manos)
+            dedos_levantados = int(dedos[-1])
+            if dibujar and dibujar_landmarks:
+                puntos_mano.dibujar_manos(frame, puntos_manos)
+
+        estado.registrar_evento(estado.motor.observar(dedos_levantados, t))
+        if not dibujar:
+            return frame
 
         dibujar_texto(frame,
                       f"Dedos detectados: {dedos_levantados if dedos_levantados is not None else '-'}",
                       (30, 80), COLOR_TEXTO_PRINCIPAL, font_scale=1.1)
-        secuencia_txt = "Secuencia: " + " - ".join(map(str, mem)) if mem else "Esperando inicio..."
+        progreso = estado.motor.progreso
+        secuencia_txt = "Secuencia: " + " - ".join(map(str, progreso)) if progreso else "Esperando inicio..."
         dibujar_texto(frame, secuencia_txt, (30, 140), COLOR_TEXTO_SECUNDARIO)
 
     # Validación cuadrado
-    elif desbloqueado and not cuadrado_detectado:
+    elif not estado.cuadrado_detectado:
+        cuadrado = analisis["cuadrado"]
+        encontrado = cuadrado is not None
+        if encontrado and dibujar:
+            cv2.drawContours(frame, [cuadrado], -1, (255, 255, 0), 3)
+        estado.contador_cuadrado = estado.contador_cuadrado + 1 if encontrado else 0
+
+        if estado.contador_cuadrado >= FRAMES_CONFIRMACION:
+            estado.cuadrado_detectado = True
+            estado.eventos.append(EventoSecuencia(
+                EVENTO_CUADRADO, estado.contador_cuadrado, (),
+                estado.usuario_desbloqueado, t))
+
+        if not dibujar:
+            return frame
+
         dibujar_texto(frame, "Sistema desbloqueado",
                       (30, 70), COLOR_TEXTO_PRINCIPAL)
         dibujar_texto(frame, "Muestra un cuadrado",
                       (30, 120), COLOR_TEXTO_SECUNDARIO)
-        encontrado = detectar_cuadrado(frame)
-        contador_cuadrado = contador_cuadrado + 1 if encontrado else 0
-
-        if contador_cuadrado >= FRAMES_CONFIRMACION:
-            cuadrado_detectado = True
-            print(Fore.GREEN + Style.BRIGHT +
-                  "\nVALIDACIÓN COMPLETADA: Cuadrado detectado.\n")
-
         if encontrado:
-            dibujar_texto(frame, f"Cuadrado detectado ({contador_cuadrado}/{FRAMES_CONFIRMACION})",
+            dibujar_texto(frame, f"Cuadrado detectado ({estado.contador_cuadrado}/{FRAMES_CONFIRMACION})",
                           (30, 180), COLOR_TEXTO_PRINCIPAL)
         else:
             dibujar_texto(frame, "Buscando figura cuadrada...",
                           (30, 180), COLOR_ALERTA)
 
-    return frame
\ No newline at end of file
+    return frame
+
+
+def procesar_frame_estado(frame, estado, modelo_manos, t=None, dibujar=True,
+                          reutilizar=False, escala=1.0, dibujar_landmarks=True):
+    """
+    Procesa cada frame de la cámara para controlar el flujo de seguridad y desbloqueo.
+
+    Args:
+        frame (numpy.ndarray): Frame actual leído desde la cámara.
+        estado (EstadoSeguridad): Estado de autenticación de esta cámara.
+        modelo_manos: Modelo de Mediapipe Hands (o compatible con process()).
+        t (float or None): Marca de tiempo del frame para el antirrebote; por
+                           defecto, la hora actual.
+        dibujar (bool): Si es False, no dibuja landmarks ni textos (modo servicio).
+        reutilizar (bool): Si es True (escena quieta), no ejecuta MediaPipe y
+                           reutiliza los últimos landmarks guardados en `estado`.
+                           La búsqueda del cuadrado se ejecuta siempre.
+        escala (float): Reducción del frame que se entrega a MediaPipe.
+        dibujar_landmarks (bool): Si es False no se dibuja el esqueleto de la mano.
+
+    Returns:
+        numpy.ndarray: Frame procesado con anotaciones y estados visuales del proceso.
+
+    Function Details:
+        - Encadena `analizar_frame` (espejo y MediaPipe durante la secuencia, o
+          búsqueda del cuadrado tras ella) y `aplicar_analisis` (motor de
+          secuencias, confirmación del cuadrado y anotaciones).
+        - Devuelve el frame anotado, listo para mostrar en pantalla por el bucle principal.
+    """
+    if reutilizar and estado.puntos_manos is not None:
+        modelo_manos = None
+    fase_cuadrado = estado.desbloqueado and not estado.cuadrado_detectado
+    if estado.desbloqueado and not fase_cuadrado:
+        modelo_manos = None
+    frame, analisis = analizar_frame(frame, modelo_manos, fase_cuadrado, escala)
+    return aplicar_analisis(frame, estado, analisis, t, dibujar, dibujar_landmarks)
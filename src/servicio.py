@@ -0,0 +1,315 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from backends_tracker import BACKENDS
+import seguridad
+from seguridad import EVENTO_CUADRADO
+from sesion import AirDrawSession
+
+# Cabecera de cada frame: ancho, alto, número de frame y marca de tiempo.
+# Le siguen alto * ancho * 3 bytes en formato BGR.
+CABECERA = struct.Struct("<IIQd")
+# Dimensiones máximas aceptadas (8K); una cabecera corrupta no debe reservar
+# gigabytes antes de fallar
+ANCHO_MAX = 7680
+ALTO_MAX = 4320
+
+LOTE_MAX = 8
+
+logger = logging.getLogger(__name__)
+
+
+def leer_exacto(flujo, n):
+    """
+    Lee exactamente n bytes de un flujo binario.
+
+    Returns:
+        bytearray or None: Los bytes leídos, o None si el flujo se cierra antes.
+    """
+    datos = bytearray(n)
+    vista = memoryview(datos)
+    leidos = 0
+    while leidos < n:
+        k = flujo.readinto(vista[leidos:])
+        if not k:
+            return None
+        leidos += k
+    return datos
+
+
+def leer_frame(flujo):
+    """
+    Lee un frame crudo precedido de su cabecera.
+
+    Args:
+        flujo: Flujo binario con método readinto (stdin, fichero o socket).
+
+    Returns:
+        tuple or None: (n, t, frame) o None al final del flujo.
+
+    Raises:
+        ValueError: Si las dimensiones de la cabecera son nulas o exceden
+                    ANCHO_MAX x ALTO_MAX.
+    """
+    cabecera = leer_exacto(flujo, CABECERA.size)
+    if cabecera is None:
+        return None
+    ancho, alto, n, t = CABECERA.unpack(cabecera)
+    if not (0 < ancho <= ANCHO_MAX and 0 < alto <= ALTO_MAX):
+        raise ValueError(f"Dimensiones de frame no válidas: {ancho}x{alto}")
+    datos = leer_exacto(flujo, ancho * alto * 3)
+    if datos is None:
+        return None
+    frame = np.frombuffer(datos, np.uint8).reshape(alto, ancho, 3)
+    return n, t, frame
+
+
+def escribir_frame(flujo, frame, n, t):
+    """
+    Escribe un frame BGR con su cabecera en un flujo binario.
+    """
+    alto, ancho = frame.shape[:2]
+    flujo.write(CABECERA.pack(ancho, alto, n, t))
+    flujo.write(np.ascontiguousarray(frame, np.uint8).data)
+
+
+class ServicioAirDraw:
+    """
+    Ejecuta una sesión AirDraw sobre frames crudos y emite eventos NDJSON.
+
+    Args:
+        sesion (AirDrawSession): Sesión sin dibujo que procesa los frames.
+        salida: Flujo binario donde se escriben los eventos, uno por línea.
+        lote_max (int): Número máximo de frames acumulados que se agrupan en un lote.
+        descartar (bool): Si es True, aplica la política de descarte por carga
+                          descrita abajo; por defecto se analizan todos los frames.
+
+    Function Details:
+        - Un hilo lector deja los frames en una cola acotada; si se llena, el
+          lector se bloquea y la contrapresión llega al productor por la tubería.
+        - Cada iteración toma todos los frames en cola (hasta `lote_max`) y los
+          analiza en orden; los eventos de todo el lote se escriben con una sola
+          escritura y un solo flush.
+        - Con `descartar`, solo el frame más reciente del lote se analiza
+          completo y los anteriores avanzan el filtro de Kalman por predicción,
+          marcados como "omitido": se pierde precisión a cambio de latencia
+          cuando la entrada supera al proceso.
+        - Si el lector falla (cabecera no válida, error de E/S o de memoria),
+          siempre deja el centinela None en la cola para que `ejecutar` termine.
+        - Eventos: "secuencia" (progreso del desbloqueo), "cuadrado" (figura
+          confirmada), "autenticado", "punto"
+          (punta detectada y estimación de Kalman), "trazo_inicio", "trazo_fin"
+          y "frame" (tiempos por frame y si se reutilizó la detección anterior).
+    """
+
+    def __init__(self, sesion, salida, lote_max=LOTE_MAX, descartar=False):
+        self.sesion = sesion
+        self.salida = salida
+        self.lote_max = lote_max
+        self.descartar = descartar
+        self.cola = queue.Queue(maxsize=4 * lote_max)
+        self.en_trazo = False
+        self.cerrado = threading.Event()
+
+    def _encolar(self, item):
+        # Espera a que haya hueco salvo que `ejecutar` ya haya terminado
+        while not self.cerrado.is_set():
+            try:
+                self.cola.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _leer(self, entrada):
+        try:
+            while True:
+                item = leer_frame(entrada)
+                if item is None or not self._encolar(item):
+                    return
+        except Exception:
+            logger.exception("Error leyendo la entrada; se cierra el flujo")
+        finally:
+            self._encolar(None)
+
+    def _eventos_frame(self, n, t, resultado, omitido, t_inicio):
+        eventos = []
+        for ev in resultado["eventos"]:
+            if ev.tipo == EVENTO_CUADRADO:
+                # El cuadrado cierra la autenticación: la sesión pasa a AirDraw
+                eventos.append({"tipo": "cuadrado", "n": n, "t": t,
+                                "frames": ev.valor, "usuario": ev.usuario})
+                eventos.append({"tipo": "autenticado", "n": n, "t": t,
+                                "usuario": ev.usuario})
+                continue
+            eventos.append({"tipo": "secuencia", "n": n, "t": t, "evento": ev.tipo,
+                            "valor": ev.valor, "progreso": list(ev.progreso),
+                            "usuario": ev.usuario})
+
+        if resultado["modo_tracker"]:
+            hay_mano = resultado["medida"] is not None
+            if resultado["inferido"] and hay_mano != self.en_trazo:
+                self.en_trazo = hay_mano
+                eventos.append({"tipo": "trazo_inicio" if hay_mano else "trazo_fin",
+                                "n": n, "t": t})
+            if resultado["estimacion"] is not None or hay_mano:
+                eventos.append({"tipo": "punto", "n": n, "t": t,
+                                "medida": resultado["medida"],
+                                "estimacion": resultado["estimacion"]})
+
+        eventos.append({"tipo": "frame", "n": n, "t": t, "omitido": omitido,
+                        "reutilizado": resultado["reutilizado"],
+                        "inferido": resultado["inferido"],
+                        "modo": "tracker" if resultado["modo_tracker"] else "seguridad",
+                        "t_inicio": t_inicio, "t_fin": time.time()})
+        return eventos
+
+    def procesar_lote(self, lote):
+        """
+        Procesa un lote de frames y devuelve sus eventos en orden.
+
+        Args:
+            lote (list): Lista de tuplas (n, t, frame) en orden de llegada.
+
+        Returns:
+            list: Eventos (dict) de todos los frames del lote.
+        """
+        eventos = []
+        for i, (n, t, frame) in enumerate(lote):
+            t_inicio = time.time()
+            omitido = self.descartar and i < len(lote) - 1
+
+            if omitido:
+                resultado = self.sesion.omitir()
+            else:
+                _, resultado = self.sesion.procesar(frame, t)
+
+            eventos.extend(self._eventos_frame(n, t, resultado, omitido, t_inicio))
+        return eventos
+
+    def emitir(self, eventos):
+        if not eventos:
+            return
+        lineas = "".join(json.dumps(ev, separators=(",", ":")) + "\n" for ev in eventos)
+        self.salida.write(lineas.encode("utf-8"))
+        self.salida.flush()
+
+    def ejecutar(self, entrada):
+        """
+        Atiende un flujo de entrada hasta que se cierra.
+
+        Args:
+            entrada: Flujo binario de frames con cabecera.
+        """
+        lector = threading.Thread(target=self._leer, args=(entrada,), daemon=True)
+        lector.start()
+
+        try:
+            fin = False
+            while not fin:
+                lote = [self.cola.get()]
+                while len(lote) < self.lote_max:
+                    try:
+                        lote.append(self.cola.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in lote:
+                    lote = lote[:lote.index(None)]
+                    fin = True
+                if lote:
+                    self.emitir(self.procesar_lote(lote))
+
+            if self.en_trazo:
+                self.emitir([{"tipo": "trazo_fin", "n": None, "t": time.time()}])
+        finally:
+            self.cerrado.set()
+            lector.join(timeout=1.0)
+
+
+def main():
+    """
+    Modo servicio de AirDraw Secure: frames crudos de entrada, eventos NDJSON de salida.
+
+    Function Details:
+        - Sin --socket, lee frames de la entrada estándar y escribe los eventos en
+          la salida estándar (para usar detrás de una tubería).
+        - Con --socket, escucha en un socket Unix local; cada conexión recibe su
+          propia AirDrawSession y su propio modelo de MediaPipe (en modo
+          seguimiento, que no puede compartirse entre flujos de vídeo); ambos se
+          cierran al terminar la conexión. Los eventos se devuelven por la misma
+          conexión.
+          Un error al procesar una conexión la cierra sin detener el servidor.
+        - Con --descartar, los frames atrasados de cada lote solo avanzan la
+          predicción de Kalman (ver `ServicioAirDraw`).
+        - Los mensajes de registro van a stderr para no mezclarse con los eventos.
+    """
+    parser = argparse.ArgumentParser(description="AirDraw Secure en modo servicio.")
+    parser.add_argument("--socket", default=None, help="Ruta del socket Unix.")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="piel")
+    parser.add_argument("--lote-max", type=int, default=LOTE_MAX)
+    parser.add_argument("--fps-objetivo", type=float, default=None)
+    parser.add_argument("--descartar", action="store_true",
+                        help="Analiza solo el frame más reciente de cada lote.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    if args.socket is None:
+        modelo_manos = seguridad.crear_modelo_manos()
+        sesion = AirDrawSession("stdin", modelo_manos, backend_tracker=args.backend,
+                                dibujar=False, fps_objetivo=args.fps_objetivo)
+        try:
+            ServicioAirDraw(sesion, sys.stdout.buffer, args.lote_max,
+                            args.descartar).ejecutar(sys.stdin.buffer)
+        finally:
+            sesion.cerrar()
+            modelo_manos.close()
+        return
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(args.socket)
+    servidor.listen(1)
+    print(f"Escuchando en {args.socket}")
+
+    contador = 0
+    try:
+        while True:
+            conexion, _ = servidor.accept()
+            contador += 1
+            with conexion, conexion.makefile("rb") as entrada, \
+                    conexion.makefile("wb") as salida:
+                modelo_manos = seguridad.crear_modelo_manos()
+                sesion = AirDrawSession(f"conexion-{contador}", modelo_manos,
+                                        backend_tracker=args.backend, dibujar=False,
+                                        fps_objetivo=args.fps_objetivo)
+                try:
+                    ServicioAirDraw(sesion, salida, args.lote_max,
+                                    args.descartar).ejecutar(entrada)
+                except (BrokenPipeError, ConnectionResetError):
+                    print(f"Conexión {contador} cerrada por el cliente.")
+                except Exception:
+                    logger.exception("Error en la conexión %d; se cierra", contador)
+                finally:
+                    sesion.cerrar()
+                    modelo_manos.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,584 @@
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import render
+import seguridad
+from backends_tracker import BACKENDS, crear_backend
+from calidad import NIVELES_CALIDAD, ControladorCalidad
+from movimiento import DetectorMovimiento
+from tracker import actualizar_trayectoria
+from tracker_kalman import crear_kalman, inicializar_estado, paso_kalman
+
+LONGITUD_TRAYECTORIA = 200
+
+# Fases de una sesión, según lo que hay que analizar en cada frame
+FASE_SECUENCIA = "secuencia"
+FASE_CUADRADO = "cuadrado"
+FASE_TRACKER = "tracker"
+FASES = (FASE_SECUENCIA, FASE_CUADRADO, FASE_TRACKER)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelosManos:
+    """
+    Modelo de MediaPipe Hands compartido por todas las sesiones de un proceso.
+
+    Args:
+        static_image_mode (bool): Modo del modelo subyacente. Con True cada frame
+                                  se analiza por separado, de modo que frames de
+                                  cámaras distintas no se mezclan en el seguimiento.
+                                  Con False solo es correcto si todos los frames
+                                  vienen de una misma secuencia (una sesión a la vez).
+
+    Function Details:
+        - Expone `process()` como un modelo normal, por lo que puede pasarse a
+          `seguridad.procesar_frame_estado` y a `BackendMediapipe(hands=...)`.
+        - Crea una instancia real por hilo trabajador: MediaPipe no admite
+          llamadas concurrentes sobre el mismo grafo, pero el número de modelos
+          queda acotado por el tamaño del pool y no por el número de cámaras.
+        - Compromiso: al compartir modelos entre cámaras se pierde el modo de
+          seguimiento de MediaPipe y cada frame ejecuta la detección completa de
+          la palma, bastante más cara. Si la memoria lo permite, es preferible
+          un Hands propio por sesión (`seguridad.crear_modelo_manos()`), que
+          conserva el seguimiento porque el planificador nunca procesa una
+          sesión en dos hilos a la vez.
+    """
+
+    def __init__(self, static_image_mode=True):
+        self.static_image_mode = static_image_mode
+        self._local = threading.local()
+        self._instancias = []
+        self._lock = threading.Lock()
+
+    def process(self, frame_rgb):
+        modelo = getattr(self._local, "modelo", None)
+        if modelo is None:
+            modelo = seguridad.crear_modelo_manos(self.static_image_mode)
+            self._local.modelo = modelo
+            with self._lock:
+                self._instancias.append(modelo)
+        return modelo.process(frame_rgb)
+
+    def close(self):
+        with self._lock:
+            for modelo in self._instancias:
+                modelo.close()
+            self._instancias.clear()
+
+
+def analizar_frame(frame, fase, modelo_manos=None, backend=None, escala=1.0):
+    """
+    Parte sin estado del procesamiento de un frame de sesión.
+
+    Args:
+        frame (np.ndarray): Frame BGR de la cámara.
+        fase (str): Fase de la sesión (FASES) con la que se analiza el frame.
+        modelo_manos: Modelo de MediaPipe para la secuencia, o None para no ejecutarlo.
+        backend (BackendTracker or None): Backend para la fase AirDraw, o None
+                                          para no detectar.
+        escala (float): Reducción del frame que se entrega a MediaPipe.
+
+    Returns:
+        tuple:
+            - frame (np.ndarray): Frame analizado (invertido en modo seguridad).
+            - analisis (dict): Fase y resultados ("manos" y "cuadrado" en modo
+              seguridad, "medida" en modo AirDraw) para `AirDrawSession.aplicar`.
+
+    Function Details:
+        - No toca el estado de ninguna sesión: pipeline.py lo ejecuta en varios
+          procesos a la vez sobre frames distintos.
+    """
+    if fase == FASE_TRACKER:
+        medida = None
+        if backend is not None:
+            medida, _ = backend.detectar(frame)
+        return frame, {"fase": fase, "medida": medida}
+
+    frame, analisis = seguridad.analizar_frame(frame, modelo_manos,
+                                               fase == FASE_CUADRADO, escala)
+    analisis["fase"] = fase
+    return frame, analisis
+
+
+class AirDrawSession:
+    """
+    Sesión de AirDraw Secure asociada a un usuario y una cámara.
+
+    Args:
+        id_sesion (str): Identificador de la sesión (por ejemplo, la estación).
+        modelos: Modelo de manos compartido (ModelosManos o un Hands propio).
+        codigos (dict or None): Códigos de desbloqueo de esta sesión.
+        backend_tracker (str): Backend de seguimiento para el modo AirDraw (clave
+                               de `backends_tracker.BACKENDS`); se valida aquí
+                               aunque el backend se cree al entrar en ese modo.
+        longitud_trayectoria (int): Número de puntos del trazo a conservar.
+        dibujar (bool): Si es False no se anota el frame (modo servicio).
+        puerta_movimiento (bool): Si es True, los frames sin movimiento reutilizan
+                                  la última detección en lugar de recalcularla.
+        fps_objetivo (float or None): Si se indica, un `ControladorCalidad` ajusta
+                                      escala, morfología, cadencia de inferencia
+                                      y detalle del dibujo para sostenerlo.
+        niveles_calidad (tuple): Niveles entre los que puede moverse el controlador.
+
+    Function Details:
+        - Posee su propio `EstadoSeguridad`, filtro de Kalman e historial de
+          trayectoria, de modo que varias sesiones conviven en un proceso.
+        - `procesar(frame)` ejecuta el mismo flujo que el bucle de main.py:
+          autenticación y después seguimiento con Kalman. Se compone de
+          `analizar_frame` (sin estado) y `aplicar` (con estado), que también
+          pueden llamarse por separado, como hace pipeline.py.
+        - Con la puerta de movimiento, un frame quieto no ejecuta MediaPipe ni la
+          segmentación: reutiliza el último resultado, pero el antirrebote de la
+          secuencia y el filtro de Kalman siguen avanzando con cada frame. La
+          búsqueda del cuadrado no se omite nunca, para que solo cuenten
+          detecciones reales en su confirmación.
+        - Con una cadencia de inferencia mayor que 1, los frames intermedios
+          reutilizan los landmarks en modo seguridad y solo predicen con Kalman
+          en modo AirDraw (resultado["inferido"] = False). La cadencia no se
+          aplica a la búsqueda del cuadrado: el control de calidad nunca rebaja
+          la confirmación de la autenticación.
+        - Una sesión no es reentrante: el planificador garantiza que cada
+          sesión se procesa en un solo hilo a la vez y en orden.
+    """
+
+    def __init__(self, id_sesion, modelos, codigos=None, backend_tracker="piel",
+                 longitud_trayectoria=LONGITUD_TRAYECTORIA, dibujar=True,
+                 puerta_movimiento=True, fps_objetivo=None,
+                 niveles_calidad=NIVELES_CALIDAD):
+        if backend_tracker not in BACKENDS:
+            raise ValueError(f"Backend desconocido: {backend_tracker}. "
+                             f"Opciones: {', '.join(BACKENDS)}")
+        self.id = id_sesion
+        self.dibujar = dibujar
+        self.modelos = modelos
+        self.backend_tracker = backend_tracker
+        self.estado = seguridad.EstadoSeguridad(codigos)
+        self.kf = crear_kalman()
+        self.kalman_inicializado = False
+        self.historial = deque(maxlen=longitud_trayectoria)
+        self.modo_tracker = False
+        self.backend = None
+        self.movimiento = DetectorMovimiento() if puerta_movimiento else None
+        self.medida_previa = None
+        self.frames_reutilizados = 0
+        self.calidad = None
+        self.nivel = niveles_calidad[0]
+        if fps_objetivo:
+            self.calidad = ControladorCalidad(fps_objetivo, niveles_calidad)
+        self.n_frame = 0
+
+    def procesar(self, frame, t=None):
+        """
+        Procesa un frame de la cámara de esta sesión.
+
+        Args:
+            frame (np.ndarray): Frame BGR de la cámara.
+            t (float or None): Marca de tiempo del frame; por defecto, la actual.
+
+        Returns:
+            tuple:
+                - frame (np.ndarray): Frame anotado.
+                - resultado (dict): Modo, medida, estimación de Kalman, eventos
+                  de la secuencia generados en este frame, si se ha reutilizado
+                  la detección anterior y si se ha ejecutado la inferencia.
+
+        Function Details:
+            - Con controlador de calidad, mide el tiempo de proceso del frame y
+              aplica el nuevo nivel cuando el controlador lo cambia.
+        """
+        if self.calidad is None:
+            return self._procesar(frame, t)
+
+        t0 = time.perf_counter()
+        salida = self._procesar(frame, t)
+        nivel = self.calidad.registrar(time.perf_counter() - t0)
+        if nivel is not None:
+            self.aplicar_calidad(nivel)
+        return salida
+
+    def aplicar_calidad(self, nivel):
+        """
+        Aplica un `NivelCalidad` a la sesión y a su backend de seguimiento.
+        """
+        self.nivel = nivel
+        if self.backend is not None:
+            self.backend.configurar(nivel)
+
+    @property
+    def fase(self):
+        """
+        str: Fase actual de la sesión (FASE_SECUENCIA, FASE_CUADRADO o FASE_TRACKER).
+        """
+        if self.modo_tracker:
+            return FASE_TRACKER
+        if self.estado.desbloqueado:
+            return FASE_CUADRADO
+        return FASE_SECUENCIA
+
+    def _procesar(self, frame, t):
+        inferir = self.n_frame % self.nivel.cadencia == 0
+        self.n_frame += 1
+
+        reutilizar = (self.movimiento is not None
+                      and not self.movimiento.hay_movimiento(frame))
+        if reutilizar:
+            self.frames_reutilizados += 1
+
+        # Solo MediaPipe y el backend siguen la cadencia y la puerta de
+        # movimiento; el cuadrado se busca en cada frame
+        fase = self.fase
+        modelo_manos = backend = None
+        if fase == FASE_TRACKER:
+            if inferir and not reutilizar:
+                backend = self._obtener_backend()
+        elif fase == FASE_SECUENCIA:
+            if (inferir and not reutilizar) or self.estado.puntos_manos is None:
+                modelo_manos = self.modelos
+
+        frame, analisis = analizar_frame(frame, fase, modelo_manos, backend,
+                                         self.nivel.escala)
+        return self.aplicar(frame, analisis, t, reutilizar, inferir)
+
+    def aplicar(self, frame, analisis, t=None, reutilizado=False, inferido=True):
+        """
+        Aplica a la sesión el análisis de un frame: secuencia, cuadrado, Kalman y dibujo.
+
+        Args:
+            frame (np.ndarray): Frame devuelto por `analizar_frame`.
+            analisis (dict): Análisis devuelto por `analizar_frame`.
+            t (float or None): Marca de tiempo del frame; por defecto, la actual.
+            reutilizado (bool): Si es True (escena quieta), en modo AirDraw se
+                                usa la medida del último frame analizado.
+            inferido (bool): Si es False (cadencia), en modo AirDraw solo se predice.
+
+        Returns:
+            tuple: (frame anotado, resultado), como `procesar`.
+
+        Function Details:
+            - Los frames deben aplicarse en orden.
+            - Un análisis hecho con una fase anterior (frames en vuelo durante
+              un cambio de fase en pipeline.py) no aporta datos: cuenta como
+              frame sin mano ni cuadrado.
+        """
+        fase = self.fase
+        if analisis["fase"] != fase:
+            analisis = {"fase": fase, "manos": None, "cuadrado": None, "medida": None}
+            inferido = False
+
+        resultado = {"id": self.id, "modo_tracker": self.modo_tracker,
+                     "medida": None, "estimacion": None, "eventos": [],
+                     "reutilizado": reutilizado, "inferido": inferido}
+
+        if fase != FASE_TRACKER:
+            frame = seguridad.aplicar_analisis(frame, self.estado, analisis, t,
+                                               self.dibujar, self.nivel.landmarks)
+            if self.dibujar:
+                render.pegar_texto(frame, "Modo Seguridad", (20, 40), (0, 0, 255))
+            while self.estado.eventos:
+                resultado["eventos"].append(self.estado.eventos.popleft())
+            if self.estado.completado:
+                self.modo_tracker = True
+                if self.movimiento is not None:
+                    self.movimiento.reiniciar()
+            return frame, resultado
+
+        if reutilizado:
+            medida = self.medida_previa
+        elif not inferido:
+            medida = None
+        else:
+            medida = analisis["medida"]
+            self.medida_previa = medida
+        resultado["medida"] = medida
+
+        if medida is not None and not self.kalman_inicializado:
+            inicializar_estado(self.kf, medida[0], medida[1])
+            self.kalman_inicializado = True
+
+        estimacion = None
+        if self.kalman_inicializado:
+            estimacion = paso_kalman(self.kf, medida)
+            resultado["estimacion"] = estimacion
+
+        if not self.dibujar:
+            self.historial.appendleft(estimacion)
+            return frame, resultado
+
+        if estimacion is not None:
+            if medida is not None:
+                cv2.circle(frame, medida, 6, (0, 255, 0), -1)
+            cv2.circle(frame, estimacion, 6, (0, 0, 255), -1)
+
+        frame = actualizar_trayectoria(frame, estimacion, self.historial,
+                                       self.nivel.trayectoria)
+        render.pegar_texto(frame, "Tracker Mano (AirDraw)", (20, 40), (0, 255, 0))
+        return frame, resultado
+
+    def omitir(self):
+        """
+        Avanza la sesión un frame sin analizarlo (frame descartado por carga).
+
+        Returns:
+            dict: Resultado con la estimación de Kalman solo por predicción, o
+                  sin estimación si la sesión aún está en modo seguridad.
+
+        Function Details:
+            - En modo AirDraw ejecuta la fase de predicción del filtro para que
+              su modelo de velocidad siga alineado con el tiempo real.
+        """
+        resultado = {"id": self.id, "modo_tracker": self.modo_tracker,
+                     "medida": None, "estimacion": None, "eventos": [],
+                     "reutilizado": False, "inferido": False}
+        if self.modo_tracker and self.kalman_inicializado:
+            resultado["estimacion"] = paso_kalman(self.kf, None)
+            self.historial.appendleft(resultado["estimacion"])
+        return resultado
+
+    def _obtener_backend(self):
+        # Se crea al primer frame AirDraw que hay que analizar en este proceso
+        if self.backend is None:
+            if self.backend_tracker == "mediapipe":
+                self.backend = crear_backend("mediapipe", dibujar=self.dibujar,
+                                             hands=self.modelos)
+            else:
+                self.backend = crear_backend(self.backend_tracker, dibujar=self.dibujar)
+            self.backend.configurar(self.nivel)
+        return self.backend
+
+    def cerrar(self):
+        if self.backend is not None:
+            self.backend.cerrar()
+
+
+class PlanificadorSesiones:
+    """
+    Reparte el procesamiento de N sesiones entre un pool de hilos trabajadores.
+
+    Args:
+        num_trabajadores (int or None): Tamaño del pool (por defecto, núcleos).
+        al_procesar (callable or None): Función (sesion, frame, resultado)
+                                        llamada desde el trabajador tras cada frame.
+
+    Function Details:
+        - Cada sesión guarda como mucho un frame pendiente; si llega otro antes
+          de procesarlo, se sustituye y se cuenta como descartado.
+        - Una sesión está en la cola de listas a lo sumo una vez, por lo que
+          nunca la procesan dos trabajadores a la vez y sus frames van en orden.
+        - OpenCV y MediaPipe liberan el GIL en sus operaciones pesadas, por lo
+          que los hilos aprovechan varios núcleos.
+        - Un error al procesar un frame se registra y se cuenta en `errores`;
+          el trabajador sigue vivo y la sesión vuelve a programarse si tiene
+          otro frame pendiente.
+        - `quitar` no cierra una sesión programada (en la cola o en manos de un
+          trabajador): la deja en `_por_cerrar` y la cierra el trabajador que la
+          saca de la cola, cuando ya no la está usando.
+    """
+
+    def __init__(self, num_trabajadores=None, al_procesar=None):
+        self.num_trabajadores = num_trabajadores or os.cpu_count() or 1
+        self.al_procesar = al_procesar
+        self.sesiones = {}
+        self.descartados = {}
+        self.errores = {}
+        self._pendientes = {}
+        self._programadas = set()
+        self._por_cerrar = {}
+        self._listas = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilos = []
+
+    def agregar(self, sesion):
+        with self._lock:
+            self.sesiones[sesion.id] = sesion
+            self.descartados[sesion.id] = 0
+            self.errores[sesion.id] = 0
+
+    def quitar(self, id_sesion):
+        with self._lock:
+            sesion = self.sesiones.pop(id_sesion, None)
+            self._pendientes.pop(id_sesion, None)
+            if sesion is None:
+                return
+            if id_sesion in self._programadas:
+                self._por_cerrar.setdefault(id_sesion, []).append(sesion)
+                return
+        sesion.cerrar()
+
+    def enviar(self, id_sesion, frame):
+        """
+        Entrega un frame a una sesión.
+
+        Args:
+            id_sesion (str): Identificador de la sesión destino.
+            frame (np.ndarray): Frame BGR.
+
+        Returns:
+            bool: False si sustituye a un frame pendiente que queda descartado.
+        """
+        with self._lock:
+            if id_sesion not in self.sesiones:
+                raise KeyError(f"Sesión desconocida: {id_sesion}")
+            descartado = id_sesion in self._pendientes
+            if descartado:
+                self.descartados[id_sesion] += 1
+            self._pendientes[id_sesion] = frame
+            if id_sesion not in self._programadas:
+                self._programadas.add(id_sesion)
+                self._listas.put(id_sesion)
+        return not descartado
+
+    def iniciar(self):
+        for i in range(self.num_trabajadores):
+            hilo = threading.Thread(target=self._trabajar,
+                                    name=f"airdraw-trabajador-{i}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def detener(self):
+        for _ in self._hilos:
+            self._listas.put(None)
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos.clear()
+        # Sin trabajadores, nada queda programado
+        with self._lock:
+            self._programadas.clear()
+            por_cerrar = [s for lista in self._por_cerrar.values() for s in lista]
+            self._por_cerrar.clear()
+        for sesion in por_cerrar:
+            sesion.cerrar()
+        for id_sesion in list(self.sesiones):
+            self.quitar(id_sesion)
+
+    def _trabajar(self):
+        while True:
+            id_sesion = self._listas.get()
+            if id_sesion is None:
+                return
+
+            with self._lock:
+                sesion = self.sesiones.get(id_sesion)
+                frame = self._pendientes.pop(id_sesion, None)
+                sin_trabajo = sesion is None or frame is None
+                if sin_trabajo:
+                    self._programadas.discard(id_sesion)
+                    por_cerrar = self._por_cerrar.pop(id_sesion, ())
+            if sin_trabajo:
+                for anterior in por_cerrar:
+                    anterior.cerrar()
+                continue
+
+            try:
+                frame, resultado = sesion.procesar(frame)
+                if self.al_procesar is not None:
+                    self.al_procesar(sesion, frame, resultado)
+            except Exception:
+                logger.exception("Error procesando un frame de la sesión %s", id_sesion)
+                with self._lock:
+                    if id_sesion in self.errores:
+                        self.errores[id_sesion] += 1
+            finally:
+                with self._lock:
+                    if id_sesion in self._pendientes:
+                        self._listas.put(id_sesion)
+                    else:
+                        self._programadas.discard(id_sesion)
+                    por_cerrar = self._por_cerrar.pop(id_sesion, ())
+                for anterior in por_cerrar:
+                    anterior.cerrar()
+
+
+def main():
+    """
+    Ejecuta varias estaciones AirDraw Secure en un único proceso.
+
+    Function Details:
+        - Abre una cámara por estación y crea una sesión para cada una.
+        - Un hilo de captura por cámara entrega frames al planificador, que los
+          procesa en el pool compartido.
+        - Cada sesión tiene su propio modelo de manos en modo seguimiento (un
+          grafo de MediaPipe por cámara). Con --modelo-compartido se usa un
+          único `ModelosManos` (un grafo por trabajador, menos memoria), a
+          cambio de ejecutar la detección completa de la palma en cada frame.
+        - El hilo principal muestra una ventana por estación; q termina.
+    """
+    parser = argparse.ArgumentParser(description="AirDraw Secure multisesión.")
+    parser.add_argument("--camaras", type=int, nargs="+", default=[0])
+    parser.add_argument("--trabajadores", type=int, default=None)
+    parser.add_argument("--backend", choices=list(BACKENDS), default="piel")
+    parser.add_argument("--fps-objetivo", type=float, default=None)
+    parser.add_argument("--modelo-compartido", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    modelos = []
+    if args.modelo_compartido:
+        modelos.append(ModelosManos())
+    salidas = {}
+
+    def al_procesar(sesion, frame, resultado):
+        salidas[sesion.id] = frame
+
+    planificador = PlanificadorSesiones(args.trabajadores, al_procesar)
+    capturas = {}
+    for camara in args.camaras:
+        cap = cv2.VideoCapture(camara)
+        if not cap.isOpened():
+            print(f"Error: no se pudo abrir la cámara {camara}.")
+            continue
+        id_sesion = f"camara-{camara}"
+        capturas[id_sesion] = cap
+        if not args.modelo_compartido:
+            modelos.append(seguridad.crear_modelo_manos())
+        planificador.agregar(AirDrawSession(id_sesion, modelos[-1],
+                                            backend_tracker=args.backend,
+                                            fps_objetivo=args.fps_objetivo))
+    if not capturas:
+        return
+
+    parar = threading.Event()
+
+    def capturar(id_sesion, cap):
+        while not parar.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            planificador.enviar(id_sesion, frame)
+
+    hilos = [threading.Thread(target=capturar, args=item, daemon=True)
+             for item in capturas.items()]
+    planificador.iniciar()
+    for hilo in hilos:
+        hilo.start()
+
+    try:
+        while not parar.is_set():
+            for id_sesion, frame in list(salidas.items()):
+                cv2.imshow(f"AirDraw Secure - {id_sesion}", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            time.sleep(0.005)
+    finally:
+        parar.set()
+        for hilo in hilos:
+            hilo.join(timeout=1.0)
+        planificador.detener()
+        for cap in capturas.values():
+            cap.release()
+        for modelo in modelos:
+            modelo.close()
+        cv2.destroyAllWindows()
+        print("Frames descartados por sesión:", planificador.descartados)
+        print("Errores por sesión:", planificador.errores)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,16 @@
 import cv2
 import numpy as np
-from collections import deque
 
-pts = deque(maxlen=200)
 
-
-def segmentar_piel(frame):
+def segmentar_piel(frame, blur=7, dilatacion=2):
     """
     Segmenta las regiones de piel presentes en la imagen utilizando el espacio
     de color YCrCb.
 
     Args:
         frame (np.ndarray): Imagen en formato BGR obtenida de la cámara.
+        blur (int): Tamaño (impar) de los filtros Gaussiano y de mediana.
+        dilatacion (int): Iteraciones de dilatación tras la erosión.
 
     Returns:
         np.ndarray: Máscara binaria donde se resaltan las regiones clasificadas
@@ -28,38 +27,52 @@ def segmentar_piel(frame):
     upper = np.array([255, 180, 135], np.uint8)
 
     mask = cv2.inRange(ycrcb, lower, upper)
-    mask = cv2.GaussianBlur(mask, (7, 7), 0)
-    mask = cv2.medianBlur(mask, 7)
+    mask = cv2.GaussianBlur(mask, (blur, blur), 0)
+    mask = cv2.medianBlur(mask, blur)
 
     kernel = np.ones((3, 3), np.uint8)
     mask = cv2.erode(mask, kernel, iterations=1)
-    mask = cv2.dilate(mask, kernel, iterations=2)
+    mask = cv2.dilate(mask, kernel, iterations=dilatacion)
 
     return mask
 
 
-def detectar_centro_mano(frame):
+def detectar_centro_mano(frame, dibujar=True, escala=1.0, blur=7, dilatacion=2):
     """
     Localiza el punto más alto de la mano detectada en la imagen.
 
     Args:
         frame (np.ndarray): Imagen en formato BGR.
+        dibujar (bool): Si es True, dibuja el contorno y el punto sobre el frame.
+        escala (float): Factor de reducción del frame antes de segmentar (1.0 = sin reducir).
+        blur (int): Tamaño de los filtros de suavizado de la máscara.
+        dilatacion (int): Iteraciones de dilatación de la máscara.
 
     Returns:
         tuple:
             - (x_top, y_top): Coordenadas del punto más alto de la mano.
             - mask (np.ndarray): Máscara de piel utilizada.
         En caso de no detectar mano: (None, mask)
+        La máscara tiene la resolución reducida si escala < 1.
 
     Descripción:
         - Obtiene la máscara de piel mediante segmentación.
         - Encuentra contornos y selecciona el más grande como la mano.
-        - Ignora contornos pequeños que se interpretan como ruido.
+        - Ignora contornos pequeños que se interpretan como ruido (el área mínima
+          se ajusta a la escala de trabajo).
+        - Las coordenadas devueltas y el contorno dibujado están siempre en la
+          resolución original del frame.
         - Busca el punto cuya coordenada 'y' sea mínima dentro del contorno,
           interpretándolo como la punta superior de la mano.
         - Dibuja el contorno en verde y el punto detectado en azul sobre el frame.
     """
-    mask = segmentar_piel(frame)
+    if escala < 1.0:
+        reducido = cv2.resize(frame, None, fx=escala, fy=escala,
+                              interpolation=cv2.INTER_AREA)
+    else:
+        escala = 1.0
+        reducido = frame
+    mask = segmentar_piel(reducido, blur, dilatacion)
 
     contours, _ = cv2.findContours(
         mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
@@ -68,19 +81,23 @@ def detectar_centro_mano(frame):
         return None, mask
 
     c = max(contours, key=cv2.contourArea)
-    if cv2.contourArea(c) < 1000:
+    if cv2.contourArea(c) < 1000 * escala * escala:
         return None, mask
 
+    if escala != 1.0:
+        c = (c / escala).astype(np.int32)
+
     topmost = tuple(c[c[:, :, 1].argmin()][0])
     x_top, y_top = int(topmost[0]), int(topmost[1])
 
-    cv2.drawContours(frame, [c], -1, (0, 255, 0), 2)
-    cv2.circle(frame, (x_top, y_top), 6, (255, 0, 0), -1)
+    if dibujar:
+        cv2.drawContours(frame, [c], -1, (0, 255, 0), 2)
+        cv2.circle(frame, (x_top, y_top), 6, (255, 0, 0), -1)
 
     return (x_top, y_top), mask
 
 
-def actualizar_trayectoria(frame, punto):
+def actualizar_trayectoria(frame, punto, historial, longitud=None):
     """
     Actualiza y dibuja la trayectoria seguida por la mano en los últimos frames.
 
@@ -88,6 +105,9 @@ def actualizar_trayectoria(frame, punto):
         frame (np.ndarray): Imagen actual de la cámara.
         punto (tuple or None): Punto predicho o medido (x, y). Si es None,
                                se considera que la mano no está visible.
+        historial (deque): Historial de puntos de la sesión.
+        longitud (int or None): Número máximo de puntos recientes a dibujar;
+                                None dibuja todo el historial.
 
     Returns:
         np.ndarray: El frame con la trayectoria dibujada.
@@ -98,14 +118,12 @@ def actualizar_trayectoria(frame, punto):
           el "air drawing".
         - Si el punto es None, añade un hueco para evitar líneas discontinuas.
     """
-    if punto is None:
-        pts.appendleft(None)
-    else:
-        pts.appendleft(punto)
+    historial.appendleft(punto)
 
-    for i in range(1, len(pts)):
-        if pts[i] is None or pts[i - 1] is None:
+    n = len(historial) if longitud is None else min(longitud, len(historial))
+    for i in range(1, n):
+        if historial[i] is None or historial[i - 1] is None:
             continue
-        cv2.line(frame, pts[i], pts[i - 1], (0, 0, 255), 3)
+        cv2.line(frame, historial[i], historial[i - 1], (0, 0, 255), 3)
 
     return frame